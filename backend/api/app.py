@@ -7,10 +7,13 @@ from flask_jwt_extended import JWTManager
 # Add backend to path to allow imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from backend.recommender.als_ncg import ALSRecommender
+from backend.recommender.als_ncg import ALSRecommender, MANIFEST_FILE
 from backend.scraper.scraper import PriceScraper
+from backend.scraper.cache import get_redis_client
+from backend.api.utils.rec_cache import RecommendationCache
 from backend.api.routes.recommendations import recommendations_bp
 from backend.api.routes.price_compare import price_compare_bp
+from backend.api.routes.similar import similar_bp
 
 def create_app():
     app = Flask(__name__)
@@ -34,16 +37,25 @@ def create_app():
     print("=" * 80)
     print("Initializing Recommender...")
     print("=" * 80)
-    # Use n_jobs=4 for parallelism
-    recommender = ALSRecommender(n_factors=10, max_iter=5, n_jobs=4)
-    # Train on dummy data for demo purposes
-    dummy_data = [
-        (0, 0, 5.0), (0, 1, 3.0), (0, 2, 4.0),
-        (1, 0, 4.0), (1, 1, 1.0), (1, 3, 5.0),
-        (2, 1, 2.0), (2, 2, 5.0), (2, 4, 3.0)
-    ]
-    recommender.fit(dummy_data)
+    model_path = os.getenv('MODEL_PATH')
+    if model_path and os.path.exists(os.path.join(model_path, MANIFEST_FILE)):
+        # Memory-mapped: all workers share one page-cached copy of the factors
+        recommender = ALSRecommender.load(model_path, n_jobs=4)
+        print(f"Loaded model {recommender.model_version} from {model_path}")
+    else:
+        # Use n_jobs=4 for parallelism
+        # Fixed seed: every worker trains the same factors, so they share one model_version
+        recommender = ALSRecommender(n_factors=10, max_iter=5, n_jobs=4, random_state=0)
+        # Train on dummy data for demo purposes
+        dummy_data = [
+            (0, 0, 5.0), (0, 1, 3.0), (0, 2, 4.0),
+            (1, 0, 4.0), (1, 1, 1.0), (1, 3, 5.0),
+            (2, 1, 2.0), (2, 2, 5.0), (2, 4, 3.0)
+        ]
+        recommender.fit(dummy_data)
     app.config['RECOMMENDER'] = recommender
+    # Per-user top-N lists; the Redis tier is shared by all workers when available
+    app.config['REC_CACHE'] = RecommendationCache(redis_client=get_redis_client())
     
     print("=" * 80)
     print("Initializing Scraper...")
@@ -54,6 +66,7 @@ def create_app():
     # Register Blueprints
     app.register_blueprint(recommendations_bp)
     app.register_blueprint(price_compare_bp)
+    app.register_blueprint(similar_bp)
     
     from backend.api.routes.auth import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -87,11 +100,11 @@ def create_app():
         try:
             # Predict using Hybrid Engine
             print(f"Calling recommender.predict with user_id={user_id}, n_top={n_top}")
-            recs = recommender.predict(user_id, n_top=n_top)
+            recs = recommender.to_records(recommender.predict(user_id, n_top=n_top))
             
             print(f"Got {len(recs)} recommendations")
             
-            # Format response (recs is already a list of dicts)
+            # Format response (recs is a list of dicts)
             data = {
                 "user_id": user_id,
                 "recommendations": recs
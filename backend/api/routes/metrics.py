@@ -30,10 +30,22 @@ def get_metrics():
     misses = int(redis_client.get('metrics:cache_misses') or 0)
     total = hits + misses
     hit_rate = round((hits / total * 100), 2) if total > 0 else 0
+    
+    stale_hits = int(redis_client.get('metrics:cache_stale_hits') or 0)
+
+    rec_hits = int(redis_client.get('metrics:rec_cache_hits') or 0)
+    rec_misses = int(redis_client.get('metrics:rec_cache_misses') or 0)
+    rec_total = rec_hits + rec_misses
+    coalesced = int(redis_client.get('metrics:scrape_coalesced') or 0)
 
     return jsonify({
         "rps": rps,
         "cache_hit_rate": hit_rate,
         "cache_hits": hits,
-        "cache_misses": misses
+        "cache_misses": misses,
+        "cache_stale_hits": stale_hits,
+        "rec_cache_hit_rate": round((rec_hits / rec_total * 100), 2) if rec_total > 0 else 0,
+        "rec_cache_hits": rec_hits,
+        "rec_cache_misses": rec_misses,
+        "scrape_coalesced": coalesced
     })
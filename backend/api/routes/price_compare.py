@@ -1,9 +1,13 @@
-from flask import Blueprint, request, current_app
+import json
+from flask import Blueprint, Response, request, current_app, stream_with_context
 from ..utils.timing import measure_latency
 from ..utils.schemas import success_response, error_response
 
 price_compare_bp = Blueprint('price_compare', __name__)
 
+# Products per batch call (cart and wishlist pages need 20-50)
+MAX_BATCH_PRODUCTS = 100
+
 @price_compare_bp.route('/compare_price', methods=['GET'])
 @measure_latency
 def compare_price():
@@ -35,3 +39,36 @@ def compare_price():
         
     except Exception as e:
         return error_response(str(e), 500)
+
+@price_compare_bp.route('/compare_price/batch', methods=['POST'])
+@measure_latency
+def compare_price_batch():
+    """
+    Comparisons for many products in one call: {"products": ["...", ...]}.
+    Cache lookups for every (site, product) are batched and only misses are fetched
+    (PriceScraper.scrape_many). With "stream": true (or Accept: application/x-ndjson)
+    one JSON line per product is streamed as soon as it completes; otherwise the
+    results come back together, in request order.
+    """
+    payload = request.get_json(silent=True) or {}
+    products = payload.get('products')
+    
+    if not isinstance(products, list) or not products or not all(isinstance(p, str) and p.strip() for p in products):
+        return error_response("products must be a non-empty list of product names")
+    if len(products) > MAX_BATCH_PRODUCTS:
+        return error_response(f"Batch larger than {MAX_BATCH_PRODUCTS} products", 413)
+        
+    scraper = current_app.config.get('SCRAPER')
+    if not scraper:
+        return error_response("Scraper service unavailable", 503)
+        
+    stream = payload.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson'
+    if stream:
+        lines = (json.dumps(entry) + "\n" for entry in scraper.scrape_many(products))
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
+    try:
+        by_product = {entry['product']: entry for entry in scraper.scrape_many(products)}
+        return success_response({"results": [by_product[p] for p in dict.fromkeys(products)]})
+    except Exception as e:
+        return error_response(str(e), 500)
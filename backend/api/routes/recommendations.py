@@ -1,13 +1,42 @@
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..utils.timing import measure_latency
 from ..utils.schemas import success_response, error_response
+import json
 import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
+# Largest batch answered as one JSON document; bigger batches must use the NDJSON stream
+MAX_BATCH_USERS = 10000
+BATCH_BLOCK_SIZE = 1024
+
+# Usernames whose user id is remembered per process (LRU); ids never change
+MAX_CACHED_USER_IDS = 100000
+
+_user_ids: "OrderedDict[str, int]" = OrderedDict()
+_user_ids_lock = threading.Lock()
+
+def _user_id_for(username: str) -> Optional[int]:
+    with _user_ids_lock:
+        if username in _user_ids:
+            _user_ids.move_to_end(username)
+            return _user_ids[username]
+    from ..models import User
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        return None
+    with _user_ids_lock:
+        _user_ids[username] = user.id
+        while len(_user_ids) > MAX_CACHED_USER_IDS:
+            _user_ids.popitem(last=False)
+    return user.id
+
 @recommendations_bp.route('/recommendations', methods=['GET'])
 @measure_latency
 @jwt_required(optional=True)
@@ -21,16 +50,16 @@ def get_recommendations():
     user_id = None
     
     if user_identity:
-        from ..models import User
-        user = User.query.filter_by(username=user_identity).first()
-        if user:
-            user_id = user.id
+        user_id = _user_id_for(user_identity)
             
     # Fallback to query param for testing or anonymous
     if user_id is None:
         user_id = request.args.get('user_id', type=int)
 
     n_top = request.args.get('n', type=int, default=5)
+    # Only used for the cold-start list (anonymous or unknown users)
+    category = request.args.get('category')
+    trending = request.args.get('trending', '').lower() in ('1', 'true')
     
     logger.info(f"user_id={user_id}, n_top={n_top}")
     
@@ -43,13 +72,23 @@ def get_recommendations():
         return error_response("Recommender service unavailable", 503)
         
     try:
-        # Predict using Hybrid Engine
-        logger.info(f"Calling recommender.predict with user_id={user_id}, n_top={n_top}")
-        recs = recommender.predict(user_id, n_top=n_top)
+        # Anonymous users get a random sample, so only per-user lists are cached
+        rec_cache = current_app.config.get('REC_CACHE')
+        model_version = getattr(recommender, 'model_version', None)
+        use_cache = (rec_cache is not None and user_id is not None and model_version is not None
+                     and category is None and not trending)
+        recs = rec_cache.get(user_id, n_top, model_version) if use_cache else None
+        
+        if recs is None:
+            # Predict using Hybrid Engine
+            logger.info(f"Calling recommender.predict with user_id={user_id}, n_top={n_top}")
+            recs = recommender.to_records(recommender.predict(user_id, n_top=n_top, category=category, trending=trending))
+            if use_cache:
+                rec_cache.set(user_id, n_top, model_version, recs)
         
         logger.info(f"Got {len(recs)} recommendations")
         
-        # Format response (recs is already a list of dicts)
+        # Format response (recs is a list of dicts)
         data = {
             "user_id": user_id,
             "recommendations": recs
@@ -61,3 +100,49 @@ def get_recommendations():
         import traceback
         traceback.print_exc()
         return error_response(str(e), 500)
+
+@recommendations_bp.route('/recommendations/batch', methods=['POST'])
+@measure_latency
+def get_recommendations_batch():
+    """
+    Top-N for many users in one call: {"user_ids": [...], "n": 5}.
+    Users are scored a block at a time with ALSRecommender.predict_batch. With
+    "stream": true (or Accept: application/x-ndjson) one JSON line per user is
+    streamed as each block finishes, so the response is never held in memory.
+    """
+    payload = request.get_json(silent=True) or {}
+    user_ids = payload.get('user_ids')
+    n_top = payload.get('n', 5)
+    
+    if not isinstance(user_ids, list) or not all(isinstance(u, int) and not isinstance(u, bool) for u in user_ids):
+        return error_response("user_ids must be a list of integers")
+    if not isinstance(n_top, int) or n_top <= 0:
+        return error_response("n must be a positive integer")
+        
+    recommender = current_app.config.get('RECOMMENDER')
+    if not recommender or recommender.U is None:
+        return error_response("Recommender service unavailable", 503)
+        
+    stream = payload.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson'
+    if stream:
+        lines = (json.dumps(entry) + "\n" for entry in _iter_batch(recommender, user_ids, n_top))
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
+    if len(user_ids) > MAX_BATCH_USERS:
+        return error_response(f"Batch larger than {MAX_BATCH_USERS} users; use stream mode", 413)
+        
+    try:
+        return success_response({"results": list(_iter_batch(recommender, user_ids, n_top))})
+    except Exception as e:
+        logger.error(f"Error in get_recommendations_batch: {str(e)}")
+        return error_response(str(e), 500)
+
+def _iter_batch(recommender, user_ids, n_top):
+    """
+    Yields one {"user_id", "recommendations"} dict per requested user, in request order.
+    Users are scored a block at a time; predict_batch gives cold users the popularity list.
+    """
+    for start in range(0, len(user_ids), BATCH_BLOCK_SIZE):
+        block = user_ids[start:start + BATCH_BLOCK_SIZE]
+        for user_id, recs in zip(block, recommender.predict_batch(block, n_top=n_top)):
+            yield {"user_id": user_id, "recommendations": recommender.to_records(recs)}
@@ -0,0 +1,30 @@
+from flask import Blueprint, request, current_app
+from ..utils.timing import measure_latency
+from ..utils.schemas import success_response, error_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+similar_bp = Blueprint('similar', __name__)
+
+@similar_bp.route('/similar/<int:item_id>', methods=['GET'])
+@measure_latency
+def get_similar(item_id):
+    """Customers-also-liked list for a product page, read from the precomputed neighbours."""
+    n_top = request.args.get('n', type=int, default=10)
+    
+    recommender = current_app.config.get('RECOMMENDER')
+    if not recommender:
+        return error_response("Recommender service unavailable", 503)
+        
+    try:
+        recs = recommender.to_records(recommender.similar(item_id, n_top=n_top))
+        return success_response({
+            "item_id": item_id,
+            "similar": recs
+        })
+    except IndexError:
+        return error_response(f"Unknown item {item_id}", 404)
+    except Exception as e:
+        logger.error(f"Error in get_similar: {str(e)}")
+        return error_response(str(e), 500)
@@ -1,10 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Interaction, User, Product
 import json
 
 tracking_bp = Blueprint('tracking', __name__)
 
+def _invalidate_recommendations(user_id):
+    """A new interaction makes the user's cached top-N lists stale."""
+    rec_cache = current_app.config.get('REC_CACHE')
+    if rec_cache is not None and user_id:
+        rec_cache.invalidate_user(user_id)
+
 @tracking_bp.route('/track/view', methods=['POST'])
 @jwt_required(optional=True)
 def track_view():
@@ -34,6 +40,7 @@ def track_view():
     try:
         db.session.add(interaction)
         db.session.commit()
+        _invalidate_recommendations(user_id)
         return jsonify({"status": "recorded"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -64,6 +71,7 @@ def track_search():
     try:
         db.session.add(interaction)
         db.session.commit()
+        _invalidate_recommendations(user_id)
         return jsonify({"status": "recorded"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
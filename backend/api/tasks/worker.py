@@ -7,12 +7,13 @@ from rq.decorators import job
 # Add backend to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-from backend.recommender.als_ncg import ALSRecommender
+from backend.recommender.als_ncg import ALSRecommender, MANIFEST_FILE
 from backend.scraper.scraper import PriceScraper
 
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
+MODEL_PATH = os.getenv('MODEL_PATH')
 
 redis_conn = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 q = Queue(connection=redis_conn)
@@ -20,14 +21,18 @@ q = Queue(connection=redis_conn)
 # We need to instantiate services here for the worker process
 # In a real production setup, we might use a factory or singleton pattern more robustly
 print("Worker initializing services...")
-recommender = ALSRecommender(n_factors=10, max_iter=5)
-# Train on dummy data
-dummy_data = [
-    (0, 0, 5.0), (0, 1, 3.0), (0, 2, 4.0),
-    (1, 0, 4.0), (1, 1, 1.0), (1, 3, 5.0),
-    (2, 1, 2.0), (2, 2, 5.0), (2, 4, 3.0)
-]
-recommender.fit(dummy_data)
+if MODEL_PATH and os.path.exists(os.path.join(MODEL_PATH, MANIFEST_FILE)):
+    # Memory-mapped, so forked workers share the factors instead of retraining
+    recommender = ALSRecommender.load(MODEL_PATH)
+else:
+    recommender = ALSRecommender(n_factors=10, max_iter=5, random_state=0)
+    # Train on dummy data
+    dummy_data = [
+        (0, 0, 5.0), (0, 1, 3.0), (0, 2, 4.0),
+        (1, 0, 4.0), (1, 1, 1.0), (1, 3, 5.0),
+        (2, 1, 2.0), (2, 2, 5.0), (2, 4, 3.0)
+    ]
+    recommender.fit(dummy_data)
 
 scraper = PriceScraper()
 
@@ -44,6 +49,22 @@ def async_recommend(user_id, n_top=5):
         print(f"Error in async_recommend: {e}")
         raise e
 
+def async_recommend_batch(user_ids, n_top=5):
+    """Background task for scoring a block of users with one matrix multiply."""
+    print(f"Processing async batch recommendation for {len(user_ids)} users")
+    try:
+        batch = recommender.predict_batch(user_ids, n_top=n_top)
+        return {
+            int(user_id): [
+                {"item_id": int(item_id), "score": round(float(score), 4)}
+                for item_id, score in recs
+            ]
+            for user_id, recs in zip(user_ids, batch)
+        }
+    except Exception as e:
+        print(f"Error in async_recommend_batch: {e}")
+        raise e
+
 def async_compare_price(product_name):
     """Background task for scraping prices."""
     print(f"Processing async price comparison for {product_name}")
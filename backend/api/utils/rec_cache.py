@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
+
+class RecommendationCache:
+    """
+    Two-tier cache of top-N recommendation lists keyed by (user_id, n, model_version).
+
+    The in-process tier is an LRU with a TTL. The optional Redis tier keeps one hash per
+    user (`recs:user:<id>`, field `<model_version>:<n>`), shared by every worker, so a
+    single DEL drops all of a user's lists. Because the model version is part of the key,
+    entries of an older model are never served; the local tier is also emptied as soon as
+    a new version is seen. invalidate_user() can only clear the local tier of the worker
+    that handles it, so with Redis local entries live at most `local_ttl` seconds: other
+    workers serve a user's stale list for no longer than that after an invalidation. Hits and misses are counted in `metrics:rec_cache_*`; the
+    counters are batched and flushed with one pipeline every `metrics_interval` seconds,
+    so a local hit costs no round trip.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: int = 300, redis_client=None,
+                 metrics_interval: float = 1.0, local_ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis = redis_client
+        # Without Redis the local tier is the only one, and invalidation reaches all of it
+        self.local_ttl = ttl if redis_client is None else min(ttl, local_ttl)
+        self.metrics_interval = metrics_interval
+        self.hits = 0
+        self.misses = 0
+        self._unflushed = [0, 0]  # hits, misses not yet added to Redis
+        self._flushed_at = time.monotonic()
+        self._entries: "OrderedDict[Tuple[int, int, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version: Optional[str] = None
+
+    @staticmethod
+    def _redis_key(user_id: int) -> str:
+        return f"recs:user:{user_id}"
+
+    def get(self, user_id: int, n: int, model_version: str) -> Optional[List[Dict[str, Any]]]:
+        key = (user_id, n, model_version)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            return self._count(hit=True, value=entry[1])
+
+        recs = self._redis_get(user_id, n, model_version)
+        if recs is not None:
+            self._store_local(key, recs)
+        return self._count(hit=recs is not None, value=recs)
+
+    def set(self, user_id: int, n: int, model_version: str, recs: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._check_version(model_version)
+        self._store_local((user_id, n, model_version), recs)
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.hset(self._redis_key(user_id), f"{model_version}:{n}", json.dumps(recs))
+                pipe.expire(self._redis_key(user_id), self.ttl)
+                pipe.execute()
+            except Exception as e:
+                print(f"Recommendation cache write error: {e}")
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drops every cached list of the user (all n, all model versions)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._redis_key(user_id))
+            except Exception as e:
+                print(f"Recommendation cache invalidation error: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, model_version: str) -> None:
+        # A new model makes every local entry unreachable; free them right away
+        if model_version != self._model_version:
+            self._entries.clear()
+            self._model_version = model_version
+
+    def _store_local(self, key: Tuple[int, int, str], recs: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.local_ttl, recs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, user_id: int, n: int, model_version: str) -> Optional[List[Dict[str, Any]]]:
+        if self.redis is None:
+            return None
+        try:
+            data = self.redis.hget(self._redis_key(user_id), f"{model_version}:{n}")
+            return json.loads(data) if data else None
+        except Exception as e:
+            print(f"Recommendation cache read error: {e}")
+            return None
+
+    def flush_metrics(self) -> None:
+        with self._lock:
+            (hits, misses), self._unflushed = self._unflushed, [0, 0]
+            self._flushed_at = time.monotonic()
+        if self.redis is None or not (hits or misses):
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.incrby('metrics:rec_cache_hits', hits)
+            pipe.incrby('metrics:rec_cache_misses', misses)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def _count(self, hit: bool, value):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._unflushed[0 if hit else 1] += 1
+            due = time.monotonic() - self._flushed_at >= self.metrics_interval
+        if due:
+            self.flush_metrics()
+        return value
@@ -2,15 +2,34 @@ import numpy as np
 import time
 import logging
 import random
-from scipy.sparse import csr_matrix
-from .parallel_engine import update_user_factors_parallel, update_item_factors_parallel
+import os
+import json
+import hashlib
+import threading
+from scipy.sparse import csr_matrix, diags
+from .parallel_engine import (
+    update_user_factors_parallel, update_item_factors_parallel, SharedMemoryALS,
+    _solve_rows_batched, _solve_rows_implicit,
+)
 from .gpu_engine import GPUEngine
+from .numba_engine import NumbaALS, NumbaSGD, HAS_NUMBA
+from .ann_index import IVFIndex
+from .item_similarity import top_k_cosine_neighbours
+from .popularity import PopularityTier
 from typing import List, Tuple, Optional, Union, Any, Dict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ALS-NCG")
 
+# Bump when the on-disk layout written by ALSRecommender.save changes
+ARTIFACT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# fit() precomputes item neighbours only up to this catalog size; for larger catalogs
+# save() builds them once, in the training job, and workers memory-map the result
+SIMILAR_AUTO_MAX_ITEMS = 10000
+
 # Hardcoded sample products to bypass database issues
 SAMPLE_PRODUCTS = [
     {"item_id": 1, "name": "Apple iPhone 15 Pro", "score": 0.9, "image_url": "https://via.placeholder.com/300x300?text=iPhone+15", "price": 129900, "currency": "₹", "rating": 4.8, "reviews": 1250},
@@ -25,23 +44,174 @@ SAMPLE_PRODUCTS = [
     {"item_id": 10, "name": "PlayStation 5", "score": 0.87, "image_url": "https://via.placeholder.com/300x300?text=PS5", "price": 54990, "currency": "₹", "rating": 4.8, "reviews": 2300},
 ]
 
+def als_objective(U: np.ndarray, V: np.ndarray, rows: np.ndarray, cols: np.ndarray, data: np.ndarray,
+                  regularization: float) -> float:
+    """Regularized squared error over the observed entries, the quantity every ALS half-step minimizes."""
+    err = data - np.einsum('ij,ij->i', U[rows], V[cols])
+    return 0.5 * float(err @ err) + 0.5 * regularization * (float(np.sum(U * U)) + float(np.sum(V * V)))
+
+def implicit_objective(U: np.ndarray, V: np.ndarray, rows: np.ndarray, cols: np.ndarray, data: np.ndarray,
+                       regularization: float, alpha: float) -> float:
+    """
+    Confidence-weighted implicit-feedback loss over every user-item pair.
+    The unobserved part uses sum((U.T @ U) * (V.T @ V)), so the cost is O(nnz * k + (m + n) * k^2).
+    """
+    scores = np.einsum('ij,ij->i', U[rows], V[cols])
+    all_pairs = float(np.sum((U.T @ U) * (V.T @ V)))
+    observed = float(np.sum((1 + alpha * data) * (1 - scores) ** 2))
+    unobserved = all_pairs - float(scores @ scores)
+    return 0.5 * (observed + unobserved) + 0.5 * regularization * (float(np.sum(U * U)) + float(np.sum(V * V)))
+
+def als_gradient(U: np.ndarray, V: np.ndarray, rows: np.ndarray, cols: np.ndarray, data: np.ndarray,
+                 regularization: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Gradient of `als_objective` with respect to U and V."""
+    err = data - np.einsum('ij,ij->i', U[rows], V[cols])
+    E = csr_matrix((err, (rows, cols)), shape=(U.shape[0], V.shape[0]))
+    return regularization * U - E @ V, regularization * V - E.T @ U
+
+def _line_search(U, V, dU, dV, rows, cols, data, regularization) -> Tuple[float, float]:
+    """
+    Exact line search along (dU, dV).
+    For matrix factorization f(x + a*d) is a quartic in a, so one pass over the
+    ratings gives its coefficients and the best step is a root of the cubic derivative.
+    Returns (alpha, objective at alpha).
+    """
+    Ur, Vc, dUr, dVc = U[rows], V[cols], dU[rows], dV[cols]
+    e = data - np.einsum('ij,ij->i', Ur, Vc)
+    a = np.einsum('ij,ij->i', dUr, Vc) + np.einsum('ij,ij->i', Ur, dVc)
+    c = np.einsum('ij,ij->i', dUr, dVc)
+    lam = regularization
+    
+    coeffs = np.array([
+        0.5 * (c @ c),
+        a @ c,
+        0.5 * (a @ a - 2 * (e @ c)) + 0.5 * lam * (np.sum(dU * dU) + np.sum(dV * dV)),
+        -(e @ a) + lam * (np.sum(U * dU) + np.sum(V * dV)),
+        0.5 * (e @ e) + 0.5 * lam * (np.sum(U * U) + np.sum(V * V)),
+    ])
+    
+    candidates = [0.0, 1.0]
+    derivative = np.polyder(coeffs)
+    if np.any(derivative[:-1]):
+        roots = np.roots(np.trim_zeros(derivative, 'f'))
+        candidates.extend(float(r.real) for r in roots if abs(r.imag) < 1e-10)
+    values = [float(np.polyval(coeffs, alpha)) for alpha in candidates]
+    best = int(np.argmin(values))
+    return candidates[best], values[best]
+
+def _copy_matching_rows(target: np.ndarray, source: np.ndarray, source_ids: Optional[np.ndarray],
+                        target_ids: Optional[np.ndarray]) -> int:
+    """
+    Copies rows of `source` into `target` wherever the raw ids match (by position when
+    either side has no ids). Returns the number of rows reused.
+    """
+    if source_ids is None or target_ids is None:
+        n = min(len(source), len(target))
+        target[:n] = source[:n]
+        return n
+
+    # Rows appended by fold-in after the last fit have no id and are never matched
+    source_ids = source_ids[:len(source)]
+    if len(source_ids) == 0:
+        return 0
+    order = np.argsort(source_ids, kind='stable')
+    sorted_ids = source_ids[order]
+    pos = np.searchsorted(sorted_ids, target_ids)
+    pos_clipped = np.minimum(pos, len(sorted_ids) - 1)
+    found = (pos < len(sorted_ids)) & (sorted_ids[pos_clipped] == target_ids)
+    target[found] = source[order[pos_clipped[found]]]
+    return int(found.sum())
+
+def _file_sha256(filename: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _manifest_files(path: str) -> set:
+    """Array files referenced by the manifest in `path` (empty if there is none)."""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            return {entry["file"] for entry in json.load(f)["arrays"].values()}
+    except (OSError, ValueError, KeyError):
+        return set()
+
 class ALSRecommender:
-    def __init__(self, n_factors: int = 20, regularization: float = 0.1, max_iter: int = 10, use_gpu: bool = False, n_jobs: int = 1):
+    BACKENDS = ("thread", "process")
+    ENGINES = ("numpy", "numba", "numba_sgd")
+    OPTIMIZERS = ("als", "als_ncg")
+
+    def __init__(self, n_factors: int = 20, regularization: float = 0.1, max_iter: int = 10, use_gpu: bool = False, n_jobs: int = 1,
+                 backend: str = "thread", engine: str = "numpy", optimizer: str = "als", implicit: bool = False,
+                 alpha: float = 40.0, tol: float = 0.0, track_loss: bool = False, warm_start: bool = False,
+                 use_ann: bool = False, ann_probe: int = 16, n_similar: int = 20,
+                 random_state: Optional[int] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Expected one of {self.BACKENDS}")
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Expected one of {self.ENGINES}")
+        if optimizer not in self.OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}'. Expected one of {self.OPTIMIZERS}")
+        if implicit and (engine != "numpy" or optimizer != "als"):
+            raise ValueError("Implicit feedback is only supported by the NumPy engine with optimizer='als'")
+        if backend == "process" and engine != "numpy":
+            # Numba kernels parallelize with their own threads; the process pool would be ignored
+            raise ValueError(f"backend='process' only applies to the NumPy engine, not engine='{engine}'")
         self.n_factors = n_factors
         self.regularization = regularization
         self.max_iter = max_iter
         self.use_gpu = use_gpu
         self.n_jobs = n_jobs
+        self.backend = backend
+        self.engine = engine
+        self.optimizer = optimizer
+        self.implicit = implicit
+        self.alpha = alpha
+        self.tol = tol
+        self.track_loss = track_loss
+        self.warm_start = warm_start
+        self.use_ann = use_ann
+        self.ann_probe = ann_probe
+        self.n_similar = n_similar
+        self.random_state = random_state
+        self.history_: List[Dict[str, float]] = []
+        self._buffers: Dict[str, np.ndarray] = {}  # over-allocated backing arrays for U/V growth
         self.U: Optional[np.ndarray] = None
         self.V: Optional[np.ndarray] = None
         self.gpu_engine = GPUEngine() if use_gpu else None
         self.train_matrix: Optional[Any] = None
+        self.user_ids: Optional[np.ndarray] = None  # raw id of each row of U (None = positional)
+        self.item_ids: Optional[np.ndarray] = None  # raw id of each row of V
+        self.model_version: Optional[str] = None  # digest of the factors (and updates since); artifact checksum once saved/loaded
+        self.index: Optional[IVFIndex] = None  # MIPS index over V, rebuilt lazily after V changes
+        self.similar_items: Optional[np.ndarray] = None   # int32 [n_items, n_similar] cosine neighbours
+        self.similar_scores: Optional[np.ndarray] = None  # float16 similarities, best first
+        self._similar_lock = threading.Lock()
+        self.popularity: Optional[PopularityTier] = None  # cold-start rankings, rebuilt every fit
+        self.item_metadata: Dict[str, np.ndarray] = {}  # per-item rating/reviews/category/recent arrays
         self.product_cache: List[Dict[str, Any]] = SAMPLE_PRODUCTS.copy()  # Use hardcoded products
         
-    def fit(self, train_data: Union[List[Tuple[int, int, float]], Any]) -> None:
+    def fit(self, train_data: Union[List[Tuple[int, int, float]], Any],
+            validation_data: Union[List[Tuple[int, int, float]], Any, None] = None,
+            user_ids: Optional[Any] = None, item_ids: Optional[Any] = None) -> None:
         """
-        Train the model using ALS.
+        Train the model using ALS, or ALS-preconditioned NCG when optimizer="als_ncg".
         train_data: List of (user, item, rating) tuples or a sparse matrix.
+        validation_data: Optional held-out ratings in the same form (e.g. the test half
+            of Preprocessor.split_data); its RMSE is recorded after every sweep.
+        With implicit=True the values are interaction weights, not ratings: every
+        user-item pair is fitted with confidence 1 + alpha * weight (Hu, Koren & Volinsky).
+
+        With track_loss, tol > 0 or validation data, each sweep appends loss, val_rmse
+        and time to `history_`. Training stops early once the monitored value (validation
+        RMSE if given, else training loss) improves by no more than tol relative to the
+        previous sweep.
+
+        user_ids / item_ids: Raw id of every matrix row / column, e.g. from
+            DatasetLoader.get_id_arrays(). With warm_start=True, users and items whose id
+            was present in the previous fit start from their old factors; only new ones
+            are drawn at random. Without ids, rows are matched by position.
         """
         logger.info("Initializing model...")
         
@@ -52,55 +222,690 @@ class ALSRecommender:
             n_items = max(items) + 1
             self.train_matrix = csr_matrix((ratings, (users, items)), shape=(n_users, n_items))
         else:
-            self.train_matrix = train_data
+            self.train_matrix = csr_matrix(train_data)
             
         n_users, n_items = self.train_matrix.shape
         
-        # Initialize factors randomly
-        self.U = np.random.normal(scale=1./self.n_factors, size=(n_users, self.n_factors))
-        self.V = np.random.normal(scale=1./self.n_factors, size=(n_items, self.n_factors))
+        user_ids = self._check_ids(user_ids, n_users, "user_ids")
+        item_ids = self._check_ids(item_ids, n_items, "item_ids")
+        previous = (self.U, self.V, self.user_ids, self.item_ids)
+
+        # Initialize factors randomly (reproducibly with random_state)
+        self._buffers = {}
+        rng = np.random if self.random_state is None else np.random.default_rng(self.random_state)
+        self.U = rng.normal(scale=1./self.n_factors, size=(n_users, self.n_factors))
+        self.V = rng.normal(scale=1./self.n_factors, size=(n_items, self.n_factors))
+
+        if self.warm_start and previous[0] is not None:
+            if previous[0].shape[1] != self.n_factors:
+                logger.warning("Previous factors have a different rank; warm start skipped.")
+            else:
+                reused_users = _copy_matching_rows(self.U, previous[0], previous[2], user_ids)
+                reused_items = _copy_matching_rows(self.V, previous[1], previous[3], item_ids)
+                logger.info(f"Warm start: reused {reused_users}/{n_users} users and {reused_items}/{n_items} items")
+        self.user_ids, self.item_ids = user_ids, item_ids
+        self.model_version = None  # set from the trained factors below
+        self._item_factors_changed()
         
         logger.info(f"Training on {n_users} users and {n_items} items.")
         
         start_time = time.time()
         
-        for i in range(self.max_iter):
-            iter_start = time.time()
+        use_gpu = bool(self.use_gpu and self.gpu_engine and self.gpu_engine.enabled)
+        if use_gpu and self.implicit:
+            logger.warning("GPU engine has no implicit-feedback solver. Using CPU ALS.")
+            use_gpu = False
+        coo = self.train_matrix.tocoo()
+        solver = None if use_gpu else self._make_solver()
+        if solver is not None:
+            self.U, self.V = solver.U, solver.V
+        gpu_coo = coo if use_gpu else None
+        ncg_state: Dict[str, Any] = {}
+
+        validation = self._as_coo_arrays(validation_data) if validation_data is not None else None
+        monitor = self.track_loss or self.tol > 0 or validation is not None
+        self.history_ = []
+        previous = None
+
+        try:
+            for i in range(self.max_iter):
+                iter_start = time.time()
+                loss = None
+                if self.optimizer == "als_ncg":
+                    loss = self._ncg_step(ncg_state, coo, solver, gpu_coo)
+                else:
+                    self._als_sweep(solver, gpu_coo)
+                    if monitor:
+                        loss = self._loss(coo.row, coo.col, coo.data)
+
+                record: Dict[str, float] = {"iteration": i + 1}
+                message = f"Iteration {i+1}/{self.max_iter}"
+                if loss is not None:
+                    record["loss"] = loss
+                    message += f" - Loss: {loss:.4f}"
+                if validation is not None:
+                    record["val_rmse"] = self._rmse(*validation)
+                    message += f" - Val RMSE: {record['val_rmse']:.4f}"
+                record["time"] = time.time() - iter_start
+                self.history_.append(record)
+                logger.info(f"{message} - Time: {record['time']:.2f}s")
+
+                current = record.get("val_rmse", loss)
+                if self.tol > 0 and previous is not None and current is not None:
+                    if previous - current <= self.tol * abs(previous):
+                        logger.info(f"Converged after {i+1} iterations (tol={self.tol})")
+                        break
+                previous = current
+        finally:
+            if solver is not None:
+                self.U, self.V = solver.U.copy(), solver.V.copy()
+                solver.close()
             
-            if self.use_gpu and self.gpu_engine and self.gpu_engine.enabled:
-                # GPU Path
-                coo = self.train_matrix.tocoo()
-                self.U, self.V = self.gpu_engine.matrix_factorization_step(
-                    self.U, self.V, coo, self.regularization
-                )
+        logger.info(f"Training complete in {time.time() - start_time:.2f}s")
+        # Workers that train on the same data with the same random_state agree on the version
+        self.model_version = self._digest(None, self.U, self.V)
+        if self.use_ann:
+            self.build_index()
+        if 0 < self.n_similar and self.V.shape[0] <= SIMILAR_AUTO_MAX_ITEMS:
+            self.precompute_similar()
+        elif self.n_similar > 0:
+            logger.info("Large catalog: neighbour lists are built by save() or precompute_similar()")
+        self._fit_popularity()
+
+    def set_item_metadata(self, rating: Optional[Any] = None, reviews: Optional[Any] = None,
+                          category: Optional[Any] = None, recent: Optional[Any] = None) -> None:
+        """
+        Catalog data for the cold-start tier, one entry per item column (see
+        InteractionLoader.item_metadata). Rebuilds the tier if the model is trained.
+        """
+        arrays = {"rating": rating, "reviews": reviews, "category": category, "recent": recent}
+        self.item_metadata = {name: np.asarray(a) for name, a in arrays.items() if a is not None}
+        if self.train_matrix is not None:
+            self._fit_popularity()
+
+    def _fit_popularity(self) -> None:
+        n_items = self.train_matrix.shape[1]
+        metadata = {name: a for name, a in self.item_metadata.items() if len(a) == n_items}
+        if len(metadata) < len(self.item_metadata):
+            logger.warning("Item metadata does not match the number of items; ignoring mismatched arrays.")
+        self.popularity = PopularityTier().fit(self.train_matrix, **metadata)
+
+    def is_cold_user(self, user_id: Optional[int]) -> bool:
+        """True for anonymous users, users outside train_matrix and users without ratings."""
+        if user_id is None or self.train_matrix is None:
+            return True
+        if not 0 <= user_id < self.train_matrix.shape[0]:
+            return True
+        return self.train_matrix.indptr[user_id] == self.train_matrix.indptr[user_id + 1]
+
+    def precompute_similar(self, k: Optional[int] = None) -> None:
+        """Stores the top-k cosine neighbours of every item (see top_k_cosine_neighbours)."""
+        if self.V is None:
+            raise RuntimeError("Model is not trained")
+        items, scores = top_k_cosine_neighbours(self.V, k or self.n_similar)
+        with self._similar_lock:
+            self.similar_items, self.similar_scores = items, scores
+
+    def similar(self, item_id: int, n_top: int = 10) -> List[Tuple[int, float]]:
+        """
+        Items most similar to item_id as (item_id, cosine similarity) tuples.
+        A row lookup into the precomputed neighbour lists; at most n_similar are returned.
+        Without lists (a large catalog that has not been saved yet), only this item is
+        scored against the catalog; the full build never runs in the request path.
+        """
+        if self.V is None:
+            raise RuntimeError("Model is not trained")
+        if not 0 <= item_id < self.V.shape[0]:
+            raise IndexError(f"Unknown item {item_id}")
+        items, scores = self.similar_items, self.similar_scores
+        if items is None:
+            items, scores = top_k_cosine_neighbours(self.V, self.n_similar or n_top, rows=np.array([item_id]))
+            item_id = 0
+        return [(int(i), float(s)) for i, s in zip(items[item_id, :n_top], scores[item_id, :n_top]) if i >= 0]
+
+    def _item_factors_changed(self, items: Optional[np.ndarray] = None) -> None:
+        """
+        Called whenever V changes. The ANN index is rebuilt on next use. Neighbour lists
+        are dropped after a full fit; after an incremental update only the rows of the
+        changed `items` are recomputed (other lists keep their possibly older neighbours
+        until the next precompute_similar()).
+        """
+        self.index = None
+        if items is None or self.similar_items is None:
+            with self._similar_lock:
+                self.similar_items = self.similar_scores = None
+            return
+
+        k = self.similar_items.shape[1]
+        rows, row_scores = top_k_cosine_neighbours(self.V, k, rows=items)
+        with self._similar_lock:
+            similar_items, similar_scores = self.similar_items, self.similar_scores
+            n_items = self.V.shape[0]
+            if len(similar_items) < n_items or not similar_items.flags.writeable:
+                # New items get rows; memory-mapped lists are copied before writing
+                grown_items = np.full((n_items, k), -1, dtype=np.int32)
+                grown_scores = np.zeros((n_items, k), dtype=np.float16)
+                grown_items[:len(similar_items)] = similar_items
+                grown_scores[:len(similar_scores)] = similar_scores
+                similar_items, similar_scores = grown_items, grown_scores
+            similar_items[items], similar_scores[items] = rows, row_scores
+            self.similar_items, self.similar_scores = similar_items, similar_scores
+
+    def build_index(self, n_lists: Optional[int] = None, n_probe: Optional[int] = None) -> IVFIndex:
+        """
+        Builds the IVF inner-product index over V that predict() uses when use_ann=True.
+        n_probe (default ann_probe) is the recall/latency knob; see IVFIndex.
+        """
+        if self.V is None:
+            raise RuntimeError("Model is not trained")
+        self.index = IVFIndex(n_lists=n_lists, n_probe=self.ann_probe if n_probe is None else n_probe).build(self.V)
+        return self.index
+
+    @staticmethod
+    def _check_ids(ids: Optional[Any], expected: int, name: str) -> Optional[np.ndarray]:
+        if ids is None:
+            return None
+        ids = np.asarray(ids)
+        if len(ids) != expected:
+            raise ValueError(f"{name} has {len(ids)} entries but the rating matrix has {expected}")
+        return ids
+
+    def rmse(self, data: Union[List[Tuple[int, int, float]], Any]) -> float:
+        """Root mean squared error of the model on (user, item, rating) tuples or a sparse matrix."""
+        if self.U is None or self.V is None:
+            raise RuntimeError("Model is not trained")
+        return self._rmse(*self._as_coo_arrays(data))
+
+    def _rmse(self, rows: np.ndarray, cols: np.ndarray, data: np.ndarray) -> float:
+        # Entries outside the trained shape (users/items never seen in training) are skipped
+        known = (rows < self.U.shape[0]) & (cols < self.V.shape[0])
+        if not known.any():
+            return float("nan")
+        rows, cols, data = rows[known], cols[known], data[known]
+        err = data - np.einsum('ij,ij->i', self.U[rows], self.V[cols])
+        return float(np.sqrt(err @ err / len(err)))
+
+    def _loss(self, rows: np.ndarray, cols: np.ndarray, data: np.ndarray) -> float:
+        if self.implicit:
+            return implicit_objective(self.U, self.V, rows, cols, data, self.regularization, self.alpha)
+        return als_objective(self.U, self.V, rows, cols, data, self.regularization)
+
+    @staticmethod
+    def _as_coo_arrays(data) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if isinstance(data, list):
+            if not data:
+                empty = np.empty(0, dtype=np.int64)
+                return empty, empty, np.empty(0)
+            rows, cols, values = zip(*data)
+            return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64), np.asarray(values, dtype=float)
+        coo = csr_matrix(data).tocoo()
+        return coo.row.astype(np.int64), coo.col.astype(np.int64), coo.data.astype(float)
+
+    @property
+    def _implicit_alpha(self) -> Optional[float]:
+        return self.alpha if self.implicit else None
+
+    def _make_solver(self):
+        """Builds the in-place sweep solver for the configured engine/backend, if any."""
+        if self.engine in ("numba", "numba_sgd"):
+            if not HAS_NUMBA:
+                logger.warning("Numba unavailable. Falling back to the NumPy engine.")
+            elif self.engine == "numba":
+                return NumbaALS(self.train_matrix, self.U, self.V)
             else:
-                # CPU Parallel ALS Path
-                self.U = update_user_factors_parallel(
-                    self.U, self.V, self.train_matrix, self.regularization, n_jobs=self.n_jobs
-                )
-                
-                self.V = update_item_factors_parallel(
-                    self.U, self.V, self.train_matrix, self.regularization, n_jobs=self.n_jobs
-                )
-            
-            logger.info(f"Iteration {i+1}/{self.max_iter} - Time: {time.time() - iter_start:.2f}s")
+                # Seeds the epoch shuffles; runs repeat exactly with one Numba thread
+                return NumbaSGD(self.train_matrix, self.U, self.V, seed=self.random_state)
+        if self.backend == "process":
+            # Ratings and factors go into shared memory once; every sweep reuses them
+            return SharedMemoryALS(self.train_matrix, self.U, self.V, n_jobs=self.n_jobs, alpha=self._implicit_alpha)
+        return None
+
+    def _als_sweep(self, solver=None, gpu_coo=None) -> None:
+        """One full sweep: update all user factors, then all item factors."""
+        if gpu_coo is not None:
+            # GPU Path
+            self.U, self.V = self.gpu_engine.matrix_factorization_step(
+                self.U, self.V, gpu_coo, self.regularization
+            )
+        elif solver is not None:
+            # Shared-memory process pool or Numba kernels: factors are updated in place
+            solver.sweep(self.regularization)
+        else:
+            # CPU Parallel ALS Path
+            self.U = update_user_factors_parallel(
+                self.U, self.V, self.train_matrix, self.regularization, n_jobs=self.n_jobs,
+                alpha=self._implicit_alpha
+            )
             
-        logger.info(f"Training complete in {time.time() - start_time:.2f}s")
+            self.V = update_item_factors_parallel(
+                self.U, self.V, self.train_matrix, self.regularization, n_jobs=self.n_jobs,
+                alpha=self._implicit_alpha
+            )
 
-    def predict(self, user_id: int = None, n_top: int = 10) -> List[Dict[str, Any]]:
+    def _ncg_step(self, state: Dict[str, Any], coo, solver=None, gpu_coo=None) -> float:
         """
-        Hybrid Recommender using hardcoded sample products.
-        Returns random products from the sample list.
+        One ALS-NCG iteration (De Sterck): the ALS sweep acts as a nonlinear preconditioner.
+        With P(x) the ALS sweep from x = (U, V), the preconditioned gradient is
+        x - P(x). It is combined with the previous direction through a
+        Polak-Ribiere beta, and the step length comes from an exact line search.
+        Returns the objective after the step.
         """
-        logger.info(f"predict called with user_id={user_id}, n_top={n_top}")
+        rows, cols, data = coo.row, coo.col, coo.data
+        lam = self.regularization
+        U0, V0 = self.U.copy(), self.V.copy()
+        gU, gV = als_gradient(U0, V0, rows, cols, data, lam)
+        
+        # Preconditioner: one plain ALS sweep from the current point
+        self._als_sweep(solver, gpu_coo)
+        pU, pV = U0 - self.U, V0 - self.V
+        als_loss = als_objective(self.U, self.V, rows, cols, data, lam)
+        
+        g_dot_p = float(np.sum(gU * pU) + np.sum(gV * pV))
+        beta = 0.0
+        if "d" in state and state["g_dot_p"] > 0:
+            g_dot_p_prev = float(np.sum(gU * state["pU"]) + np.sum(gV * state["pV"]))
+            beta = max(0.0, (g_dot_p - g_dot_p_prev) / state["g_dot_p"])
         
+        dU, dV = -pU, -pV
+        if beta > 0:
+            dU = dU + beta * state["d"][0]
+            dV = dV + beta * state["d"][1]
+            # Restart along the plain ALS direction if this is not a descent direction
+            if np.sum(gU * dU) + np.sum(gV * dV) >= 0:
+                dU, dV, beta = -pU, -pV, 0.0
+        
+        alpha, loss = _line_search(U0, V0, dU, dV, rows, cols, data, lam)
+        if loss < als_loss:
+            self.U[...] = U0 + alpha * dU
+            self.V[...] = V0 + alpha * dV
+        else:
+            # The ALS point itself is better; keep it and take it as the direction
+            loss, dU, dV = als_loss, -pU, -pV
+        
+        state.update(d=(dU, dV), pU=pU, pV=pV, g_dot_p=g_dot_p)
+        return loss
+
+    def partial_fit(self, new_data: Union[List[Tuple[int, int, float]], Any]) -> None:
+        """
+        Incrementally adds or overwrites ratings without retraining.
+        Users and items beyond the current shape are appended. New items are first
+        solved against the current U (so the user solve does not see them as zero),
+        then the touched users are re-solved against V and the touched items against U.
+        """
+        if self.U is None or self.V is None:
+            raise RuntimeError("Model is not trained; call fit() first")
+
+        rows, cols, values = self._as_coo_arrays(new_data)
+        if len(rows) == 0:
+            return
+        n_old_items = self.V.shape[0]
+        n_users = max(self.U.shape[0], int(rows.max()) + 1)
+        n_items = max(n_old_items, int(cols.max()) + 1)
+        self._grow(n_users, n_items)
+
+        updates = csr_matrix((values, (rows, cols)), shape=(n_users, n_items))
+        # Overwrite: drop the old value wherever an update lands, then add the update
+        self.train_matrix = (self.train_matrix - self.train_matrix.multiply(updates != 0) + updates).tocsr()
+        self.train_matrix.eliminate_zeros()
+
+        items = np.unique(cols)
+        by_item = self.train_matrix.T.tocsr()
+        new_items = items[items >= n_old_items]
+        if len(new_items):
+            self.V[new_items] = self._solve_against(new_items, self.U, by_item)
+        users = np.unique(rows)
+        self.U[users] = self._solve_against(users, self.V, self.train_matrix)
+        self.V[items] = self._solve_against(items, self.U, by_item)
+        self._item_factors_changed(items)
+        self.model_version = self._digest(self.model_version, rows, cols, values)
+        logger.info(f"partial_fit: re-solved {len(users)} users and {len(items)} items")
+
+    def fold_in_users(self, csr_rows: Any, user_ids: Optional[Any] = None) -> np.ndarray:
+        """
+        Solves factors for users from their full rating rows (one row per user, items as
+        columns) against the frozen V. Existing user_ids get their row replaced; when
+        user_ids is None the users are appended. Returns the user ids that were written.
+        """
+        return self._fold_in(csr_matrix(csr_rows), user_ids, item_side=False)
+
+    def fold_in_items(self, csr_rows: Any, item_ids: Optional[Any] = None) -> np.ndarray:
+        """
+        Item counterpart of fold_in_users: one row per item with users as columns,
+        solved against the frozen U. Returns the item ids that were written.
+        """
+        return self._fold_in(csr_matrix(csr_rows), item_ids, item_side=True)
+
+    def _fold_in(self, rows_csr: csr_matrix, ids: Optional[Any], item_side: bool) -> np.ndarray:
+        if self.U is None or self.V is None:
+            raise RuntimeError("Model is not trained; call fit() first")
+
+        n_users, n_items = self.train_matrix.shape
+        n_targets = n_items if item_side else n_users
+        n_other = n_users if item_side else n_items
+        if ids is None:
+            ids = np.arange(n_targets, n_targets + rows_csr.shape[0])
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != rows_csr.shape[0]:
+            raise ValueError("Expected one id per row")
+
+        n_targets = max(n_targets, int(ids.max()) + 1 if len(ids) else 0)
+        n_other = max(n_other, rows_csr.shape[1])
+        if item_side:
+            self._grow(n_other, n_targets)
+        else:
+            self._grow(n_targets, n_other)
+        rows_csr = rows_csr.copy()
+        rows_csr.resize((rows_csr.shape[0], n_other))
+
+        # Replace the stored ratings of every folded-in row
+        keep = np.ones(n_targets)
+        keep[ids] = 0
+        coo = rows_csr.tocoo()
+        placed = csr_matrix((coo.data, (ids[coo.row], coo.col)), shape=(n_targets, n_other))
+        if item_side:
+            self.train_matrix = (self.train_matrix @ diags(keep) + placed.T).tocsr()
+            self.V[ids] = self._solve_against(np.arange(len(ids)), self.U, rows_csr)
+            self._item_factors_changed(np.unique(ids))
+        else:
+            self.train_matrix = (diags(keep) @ self.train_matrix + placed).tocsr()
+            self.U[ids] = self._solve_against(np.arange(len(ids)), self.V, rows_csr)
+            if n_other > n_items:
+                # Items first seen in these rows are solved against the new users
+                new_items = np.arange(n_items, n_other)
+                self.V[new_items] = self._solve_against(new_items, self.U, self.train_matrix.T.tocsr())
+                self._item_factors_changed(new_items)
+        self.model_version = self._digest(self.model_version, np.array([item_side]), ids,
+                                          rows_csr.indptr, rows_csr.indices, rows_csr.data)
+        return ids
+
+    @staticmethod
+    def _digest(previous: Optional[str], *arrays: np.ndarray) -> str:
+        """
+        New model version from the previous one and the arrays that changed it. Chaining
+        keeps it deterministic: workers applying the same updates in the same order agree,
+        so cached recommendations are shared between them and dropped after every update.
+        """
+        h = hashlib.sha256((previous or "").encode())
+        for array in arrays:
+            h.update(np.ascontiguousarray(array).tobytes())
+        return h.hexdigest()[:16]
+
+    def _solve_against(self, indices: np.ndarray, fixed: np.ndarray, ratings_csr: csr_matrix) -> np.ndarray:
+        """Solves the given rows of ratings_csr against a frozen factor matrix."""
+        args = (indices, fixed, ratings_csr.indptr, ratings_csr.indices, ratings_csr.data, self.regularization)
+        if self.implicit:
+            return _solve_rows_implicit(*args, self.alpha)
+        return _solve_rows_batched(*args)
+
+    def _grow(self, n_users: int, n_items: int) -> None:
+        """
+        Extends U, V (new rows start at zero) and train_matrix to the given shape.
+        New items get (empty) neighbour lists; callers recompute them once solved.
+        """
+        n_old_items = self.V.shape[0]
+        self.U = self._grow_rows("U", self.U, n_users)
+        self.V = self._grow_rows("V", self.V, n_items)
+        if self.train_matrix.shape != (n_users, n_items):
+            self.train_matrix.resize((n_users, n_items))
+        if n_items > n_old_items and self.similar_items is not None:
+            self._item_factors_changed(np.arange(n_old_items, n_items))
+
+    def _grow_rows(self, name: str, current: np.ndarray, n_rows: int) -> np.ndarray:
+        # Geometric over-allocation keeps a stream of single-user fold-ins amortized O(1) per row
+        n_current = current.shape[0]
+        if n_rows <= n_current:
+            return current
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape[0] < n_rows or not np.shares_memory(buf, current):
+            buf = np.zeros((max(n_rows, 2 * n_current, 16), current.shape[1]), dtype=current.dtype)
+            buf[:n_current] = current
+            self._buffers[name] = buf
+        buf[n_current:n_rows] = 0
+        return buf[:n_rows]
+
+    def save(self, path: str) -> str:
+        """
+        Writes the model to the directory `path` as raw .npy arrays (U, V, the CSR
+        train matrix and the id maps) plus a JSON manifest with the format version
+        and a SHA-256 per array. Returns the model version (a digest of all array checksums).
+
+        Item neighbour lists are built here if fit() skipped them (large catalogs), so
+        the O(n_items^2) pass runs once in the training job rather than in every worker.
+
+        Re-saving into a directory that workers are serving from is safe: files are
+        never rewritten in place (truncating a memory-mapped file kills its readers
+        with SIGBUS). Each array is written to a temp file and renamed to a name that
+        includes its checksum, and the manifest is swapped in last with os.replace, so
+        a crashed save leaves the previous version intact. Files of the previous version
+        are kept for workers that are still loading it; older ones are deleted.
+        """
+        if self.U is None or self.V is None:
+            raise RuntimeError("Model is not trained; call fit() first")
+        os.makedirs(path, exist_ok=True)
+        previous_files = _manifest_files(path)
+        if self.similar_items is None and self.n_similar > 0:
+            self.precompute_similar()
+
+        arrays = {
+            "U": self.U,
+            "V": self.V,
+            "indptr": self.train_matrix.indptr,
+            "indices": self.train_matrix.indices,
+            "data": self.train_matrix.data,
+        }
+        for name, ids in (("user_ids", self.user_ids), ("item_ids", self.item_ids)):
+            if ids is not None:
+                # Object arrays would need pickle and cannot be memory-mapped
+                arrays[name] = ids.astype(str) if ids.dtype == object else ids
+        if self.similar_items is not None:
+            arrays["similar_items"] = self.similar_items
+            arrays["similar_scores"] = self.similar_scores
+        for name, values in self.item_metadata.items():
+            arrays[f"item_{name}"] = values.astype(str) if values.dtype == object else values
+        if self.popularity is not None:
+            # Saved so that workers do not re-scan the interaction matrix on load
+            for name, values in self.popularity.to_arrays().items():
+                arrays[f"popularity_{name}"] = values
+
+        entries = {}
+        for name, array in arrays.items():
+            tmp_file = os.path.join(path, f".{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp_file, np.ascontiguousarray(array))
+            sha256 = _file_sha256(tmp_file)
+            filename = f"{name}.{sha256[:16]}.npy"
+            if os.path.exists(os.path.join(path, filename)):
+                os.remove(tmp_file)  # unchanged array: keep the file (and its page cache) as is
+            else:
+                os.replace(tmp_file, os.path.join(path, filename))
+            entries[name] = {"file": filename, "sha256": sha256}
+
+        digest = hashlib.sha256("".join(e["sha256"] for e in entries.values()).encode()).hexdigest()
+        manifest = {
+            "format_version": ARTIFACT_VERSION,
+            "model_version": digest[:16],
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "shape": list(self.train_matrix.shape),
+            "params": {
+                "n_factors": self.n_factors,
+                "regularization": self.regularization,
+                "implicit": self.implicit,
+                "alpha": self.alpha,
+            },
+            "arrays": entries,
+        }
+        tmp_path = os.path.join(path, MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+
+        # Unlinking is safe even while mapped: the data lives until the last reader unmaps it
+        keep = previous_files | {e["file"] for e in entries.values()}
+        for filename in os.listdir(path):
+            if filename.endswith(".npy") and not filename.startswith(".") and filename not in keep:
+                os.remove(os.path.join(path, filename))
+
+        self.model_version = manifest["model_version"]
+        logger.info(f"Saved model {self.model_version} to {path}")
+        return self.model_version
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, verify: bool = False, **kwargs) -> "ALSRecommender":
+        """
+        Loads a model written by save(). With mmap=True the arrays are memory-mapped
+        copy-on-write, so every worker process shares one page-cached copy and start-up
+        does no I/O beyond the headers; writes (partial_fit, fold-in) stay private.
+        verify=True re-hashes every array against the manifest (reads all pages).
+        Extra keyword arguments override the saved constructor parameters (e.g. n_jobs).
+        """
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported model artifact version {manifest.get('format_version')} "
+                             f"(expected {ARTIFACT_VERSION})")
+
+        arrays = {}
+        for name, entry in manifest["arrays"].items():
+            filename = os.path.join(path, entry["file"])
+            if verify and _file_sha256(filename) != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for {filename}")
+            arrays[name] = np.load(filename, mmap_mode="c" if mmap else None)
+
+        model = cls(**{**manifest["params"], **kwargs})
+        model.U, model.V = arrays["U"], arrays["V"]
+        model.train_matrix = csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                        shape=tuple(manifest["shape"]), copy=False)
+        model.user_ids = arrays.get("user_ids")
+        model.item_ids = arrays.get("item_ids")
+        model.model_version = manifest["model_version"]
+        model.similar_items = arrays.get("similar_items")
+        model.similar_scores = arrays.get("similar_scores")
+        model.item_metadata = {name[len("item_"):]: a for name, a in arrays.items()
+                               if name.startswith("item_") and name != "item_ids"}
+        popularity = {name[len("popularity_"):]: a for name, a in arrays.items() if name.startswith("popularity_")}
+        if popularity:
+            model.popularity = PopularityTier.from_arrays(popularity)
+        else:
+            model._fit_popularity()
+        if model.use_ann:
+            model.build_index()
+        logger.info(f"Loaded model {model.model_version} from {path} (mmap={mmap})")
+        return model
+
+    def predict(self, user_id: int = None, n_top: int = 10, category: Optional[str] = None,
+                trending: bool = False) -> List[Any]:
+        """
+        Top-N recommendations for a single user.
+        Returns (item_id, score) tuples scored from U[user] @ V.T, with items
+        the user already rated in train_matrix excluded. With use_ann=True only the
+        probed lists of the IVF index are scored (approximate, much faster on large catalogs).
+        Anonymous users, users outside train_matrix and users without ratings get the
+        precomputed popularity list instead (per category or trending if asked).
+        Falls back to sample products when the model is untrained.
+        """
+        logger.info(f"predict called with user_id={user_id}, n_top={n_top}")
+
+        if self.popularity is not None and self.is_cold_user(user_id):
+            return self.popularity.top(n_top, category=category, trending=trending)
+
+        if user_id is None or self.U is None or self.V is None:
+            return self._sample_products(n_top)
+
+        if self.use_ann:
+            if self.index is None:
+                self.build_index()
+            query = self.U[user_id]
+            rated = self.train_matrix[user_id].indices if user_id < self.train_matrix.shape[0] else None
+            items, scores = self.index.search(query, n_top, exclude=rated)
+            return [(int(i), float(s)) for i, s in zip(items, scores)]
+
+        # Plain indexing so unknown users raise IndexError like the factor lookup would
+        scores = self.U[user_id] @ self.V.T
+        return self._top_n(scores[np.newaxis, :], [user_id], n_top)[0]
+
+    def predict_batch(self, user_ids, n_top: int = 10, block_size: int = 1024) -> List[List[Tuple[int, float]]]:
+        """
+        Top-N recommendations for many users at once.
+        Scores each block of users with a single U[block] @ V.T multiply and
+        a row-wise argpartition, so memory stays at block_size x n_items.
+        Cold users get what predict() gives them: the popularity list for ids outside
+        the model and users without ratings (see is_cold_user). Ids outside U are never
+        used as indices (negative ones would wrap around); without a popularity tier
+        they get [].
+        """
+        if self.U is None or self.V is None:
+            raise RuntimeError("Model is not trained")
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        cold = self._cold_users(user_ids)
+        popular = self.popularity.top(n_top) if self.popularity is not None else []
+        results: List[List[Tuple[int, float]]] = []
+
+        for start in range(0, len(user_ids), block_size):
+            block = user_ids[start:start + block_size]
+            warm = ~cold[start:start + block_size]
+            scores = self.U[block[warm]] @ self.V.T
+            recs = iter(self._top_n(scores, block[warm], n_top))
+            results.extend(next(recs) if is_warm else list(popular) for is_warm in warm)
+
+        return results
+
+    def _cold_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """Mask of the ids predict_batch must not score; vectorized is_cold_user."""
+        cold = (user_ids < 0) | (user_ids >= self.U.shape[0])
+        if self.popularity is not None and self.train_matrix is not None:
+            cold |= user_ids >= self.train_matrix.shape[0]
+            known = ~cold
+            cold[known] = np.diff(self.train_matrix.indptr)[user_ids[known]] == 0
+        return cold
+
+    def to_records(self, recs: List[Any]) -> List[Dict[str, Any]]:
+        """Converts (item_id, score) tuples into JSON-ready dicts, merging cached product details."""
+        by_id = {p["item_id"]: p for p in self.product_cache}
+        records = []
+        for rec in recs:
+            if isinstance(rec, dict):
+                records.append(rec)
+                continue
+            item_id, score = rec
+            record = dict(by_id.get(int(item_id), {}))
+            record.update({"item_id": int(item_id), "score": round(float(score), 4)})
+            records.append(record)
+        return records
+
+    def _top_n(self, scores: np.ndarray, user_ids, n_top: int) -> List[List[Tuple[int, float]]]:
+        """Masks already-rated items in place and picks the top n_top of each row."""
+        n_items = scores.shape[1]
+        if self.train_matrix is not None:
+            n_known = self.train_matrix.shape[0]
+            known = np.asarray(user_ids) < n_known
+            if known.any():
+                rated = self.train_matrix[np.asarray(user_ids)[known]]
+                rows = np.repeat(np.flatnonzero(known), np.diff(rated.indptr))
+                scores[rows, rated.indices] = -np.inf
+
+        n = min(n_top, n_items)
+        if n <= 0:
+            return [[] for _ in range(scores.shape[0])]
+
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(int(i), float(s)) for i, s in zip(items, vals) if np.isfinite(s)]
+            for items, vals in zip(top, top_scores)
+        ]
+
+    def _sample_products(self, n_top: int) -> List[Dict[str, Any]]:
+        """Random sample of the hardcoded product list (used before training or for anonymous users)."""
         if not self.product_cache:
             logger.warning("Product cache is empty!")
             return []
-        
-        # Return random products from the hardcoded list
+
         num_products = min(n_top, len(self.product_cache))
         selected_products = random.sample(self.product_cache, num_products)
-        
+
         logger.info(f"Returning {len(selected_products)} recommendations from cache")
         return selected_products
@@ -1,32 +1,55 @@
 import pandas as pd
 import numpy as np
 import os
+import tempfile
+import contextlib
+import json
+import shutil
+import hashlib
+from scipy.sparse import csr_matrix
 from typing import Tuple, Dict, Optional
 
+# Bump when the layout written by load_cached changes
+CACHE_VERSION = 2
+
+# get_interaction_matrix refuses to allocate more than this (float64 users x items)
+MAX_DENSE_BYTES = 1 << 30
+
 class DatasetLoader:
     """
     Loads and processes rating data for the recommender system.
     Supports MovieLens-style (user_id, item_id, rating) CSVs.
+    
+    Ids are mapped with pd.factorize into int32 index columns (first appearance
+    order); get_csr_matrix() builds the rating matrix straight from those arrays.
+    The dict maps (user_map, reverse_user_map, ...) are only built when accessed.
     """
     
-    def __init__(self, file_path: str, sep: str = ',', names: list = None):
+    def __init__(self, file_path: str, sep: str = ',', names: list = None,
+                 dtypes: Optional[Dict[str, object]] = None, engine: Optional[str] = None):
         self.file_path = file_path
         self.sep = sep
         self.names = names or ['user_id', 'item_id', 'rating', 'timestamp']
+        # Explicit dtypes skip pandas' per-column type inference, which load_streaming would
+        # otherwise redo (possibly differently) for every chunk. Ids default to int64
+        # (MovieLens-style); pass e.g. {'item_id': 'category'} or {'item_id': str} for others.
+        self.dtypes = {'user_id': np.int64, 'item_id': np.int64, 'rating': np.float64, **(dtypes or {})}
+        # The C parser handles single-character separators; '::' (MovieLens 1M) needs python
+        self.engine = engine or ('c' if len(sep) == 1 else 'python')
         self.df = None
         self.n_users = 0
         self.n_items = 0
-        self.user_map = {}
-        self.item_map = {}
-        self.reverse_user_map = {}
-        self.reverse_item_map = {}
+        self.user_ids = np.empty(0)  # raw user id of each index
+        self.item_ids = np.empty(0)  # raw item id of each index
+        self._maps: Dict[str, dict] = {}
 
     def load_data(self) -> pd.DataFrame:
         """Loads data from CSV."""
         if not os.path.exists(self.file_path):
             raise FileNotFoundError(f"File not found: {self.file_path}")
             
-        self.df = pd.read_csv(self.file_path, sep=self.sep, names=self.names, engine='python')
+        dtypes = {col: dtype for col, dtype in self.dtypes.items() if col in self.names}
+        self.df = pd.read_csv(self.file_path, sep=self.sep, names=self.names, dtype=dtypes, engine=self.engine)
         
         # Drop missing values
         self.df.dropna(subset=['user_id', 'item_id', 'rating'], inplace=True)
@@ -41,40 +64,318 @@ class DatasetLoader:
         if self.df is None:
             self.load_data()
             
-        unique_users = self.df['user_id'].unique()
-        unique_items = self.df['item_id'].unique()
-        
-        self.n_users = len(unique_users)
-        self.n_items = len(unique_items)
+        user_idx, self.user_ids = pd.factorize(self.df['user_id'])
+        item_idx, self.item_ids = pd.factorize(self.df['item_id'])
+        self.user_ids = np.asarray(self.user_ids)
+        self.item_ids = np.asarray(self.item_ids)
         
-        self.user_map = {u: i for i, u in enumerate(unique_users)}
-        self.item_map = {i: idx for idx, i in enumerate(unique_items)}
-        
-        self.reverse_user_map = {v: k for k, v in self.user_map.items()}
-        self.reverse_item_map = {v: k for k, v in self.item_map.items()}
+        self.n_users = len(self.user_ids)
+        self.n_items = len(self.item_ids)
+        self._maps = {}
         
         # Apply mappings
-        self.df['user_idx'] = self.df['user_id'].map(self.user_map)
-        self.df['item_idx'] = self.df['item_id'].map(self.item_map)
+        self.df['user_idx'] = user_idx.astype(np.int32)
+        self.df['item_idx'] = item_idx.astype(np.int32)
+
+    @property
+    def user_map(self) -> dict:
+        return self._map('user_map', lambda: {u: i for i, u in enumerate(self.user_ids.tolist())})
+
+    @property
+    def item_map(self) -> dict:
+        return self._map('item_map', lambda: {item: i for i, item in enumerate(self.item_ids.tolist())})
 
-    def get_interaction_matrix(self) -> np.ndarray:
-        """Returns a dense user-item matrix (use with caution for large datasets)."""
+    @property
+    def reverse_user_map(self) -> dict:
+        return self._map('reverse_user_map', lambda: dict(enumerate(self.user_ids.tolist())))
+
+    @property
+    def reverse_item_map(self) -> dict:
+        return self._map('reverse_item_map', lambda: dict(enumerate(self.item_ids.tolist())))
+
+    def _map(self, name, build) -> dict:
+        if name not in self._maps:
+            self._maps[name] = build()
+        return self._maps[name]
+
+    def get_index_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (user_idx int32, item_idx int32, rating float64) arrays, one entry per rating."""
         if self.df is None or 'user_idx' not in self.df.columns:
             self.build_mappings()
             
+        return (self.df['user_idx'].to_numpy(), self.df['item_idx'].to_numpy(),
+                self.df['rating'].to_numpy(dtype=np.float64))
+
+    def get_csr_matrix(self) -> csr_matrix:
+        """
+        Returns the n_users x n_items rating matrix built directly from the index
+        arrays (duplicate ratings are summed). Pass it straight to ALSRecommender.fit.
+        """
+        user_idx, item_idx, ratings = self.get_index_arrays()
+        return csr_matrix((ratings, (user_idx, item_idx)), shape=(self.n_users, self.n_items))
+
+    def load_streaming(self, chunksize: int = 1_000_000, spill_dir: Optional[str] = None) -> csr_matrix:
+        """
+        Builds the rating matrix without holding the file in memory.
+        The CSV is read in chunks; ids are mapped incrementally (same first-appearance
+        order as build_mappings) and each chunk's COO triplets are appended to growable
+        arrays, or to raw files under spill_dir that are memory-mapped at the end. The
+        CSR is then built in one pass, so peak memory tracks nnz, not the file size.
+        Sets user_ids/item_ids/n_users/n_items; self.df stays None.
+        """
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+            
+        dtypes = {col: dtype for col, dtype in self.dtypes.items() if col in self.names}
+        reader = pd.read_csv(self.file_path, sep=self.sep, names=self.names, dtype=dtypes,
+                             engine=self.engine, usecols=['user_id', 'item_id', 'rating'], chunksize=chunksize)
+        
+        users, items = _IncrementalIndex(), _IncrementalIndex()
+        with tempfile.TemporaryDirectory(dir=spill_dir) if spill_dir else contextlib.nullcontext() as tmp:
+            columns = [_TripletColumn(np.int32, tmp, 'rows'), _TripletColumn(np.int32, tmp, 'cols'),
+                       _TripletColumn(np.float64, tmp, 'data')]
+            for chunk in reader:
+                chunk = chunk.dropna(subset=['user_id', 'item_id', 'rating'])
+                columns[0].append(users.encode(chunk['user_id']))
+                columns[1].append(items.encode(chunk['item_id']))
+                columns[2].append(chunk['rating'].to_numpy(dtype=np.float64))
+                
+            self.user_ids, self.item_ids = users.values(), items.values()
+            self.n_users, self.n_items = len(self.user_ids), len(self.item_ids)
+            self._maps = {}
+            rows, cols, data = (c.finish() for c in columns)
+            # coo -> csr conversion is a single counting-sort pass; duplicates are summed
+            matrix = csr_matrix((data, (rows, cols)), shape=(self.n_users, self.n_items))
+            del rows, cols, data
+        return matrix
+
+    def get_interaction_matrix(self, max_bytes: int = MAX_DENSE_BYTES) -> np.ndarray:
+        """
+        Returns a dense user-item matrix (use with caution for large datasets).
+        Raises MemoryError when it would exceed max_bytes; use get_csr_matrix instead.
+        """
+        if self.df is None or 'user_idx' not in self.df.columns:
+            self.build_mappings()
+            
+        needed = self.n_users * self.n_items * np.dtype(np.float64).itemsize
+        if needed > max_bytes:
+            raise MemoryError(f"Dense {self.n_users} x {self.n_items} matrix needs {needed / 2**30:.1f} GiB; "
+                              f"use get_csr_matrix() instead")
+            
+        user_idx, item_idx, ratings = self.get_index_arrays()
         matrix = np.zeros((self.n_users, self.n_items))
-        for row in self.df.itertuples():
-            matrix[row.user_idx, row.item_idx] = row.rating
+        matrix[user_idx, item_idx] = ratings
             
         return matrix
 
+    def get_csr_with_timestamps(self) -> Tuple[csr_matrix, np.ndarray]:
+        """
+        Returns the rating matrix plus an int64 timestamp per stored entry, aligned with
+        its data array. Duplicate (user, item) ratings are summed and keep the latest
+        timestamp; a missing timestamp column gives zeros.
+        """
+        user_idx, item_idx, ratings = self.get_index_arrays()
+        if 'timestamp' in self.df.columns:
+            timestamps = self.df['timestamp'].fillna(0).to_numpy(dtype=np.int64)
+        else:
+            timestamps = np.zeros(len(ratings), dtype=np.int64)
+            
+        order = np.lexsort((item_idx, user_idx))
+        user_idx, item_idx = user_idx[order], item_idx[order]
+        # First entry of every distinct (user, item) run
+        starts = np.flatnonzero(np.r_[True, (user_idx[1:] != user_idx[:-1]) | (item_idx[1:] != item_idx[:-1])])
+        if len(order) == 0:
+            starts = np.empty(0, dtype=np.int64)
+            
+        indptr = np.zeros(self.n_users + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user_idx[starts], minlength=self.n_users), out=indptr[1:])
+        data = np.add.reduceat(ratings[order], starts) if len(starts) else ratings[:0]
+        timestamps = np.maximum.reduceat(timestamps[order], starts) if len(starts) else timestamps[:0]
+        matrix = csr_matrix((data, item_idx[starts], indptr), shape=(self.n_users, self.n_items))
+        return matrix, timestamps
+
+    def load_cached(self, cache_dir: Optional[str] = None) -> Tuple[csr_matrix, np.ndarray]:
+        """
+        Like get_csr_with_timestamps, but backed by a binary cache next to the source
+        (`<file>.cache/` unless cache_dir is given): the CSR arrays, id maps and
+        timestamps as .npy files plus meta.json with the source's size, mtime and
+        SHA-256 and the parse settings (sep, names, dtypes). A valid cache is
+        memory-mapped, so repeated loads skip CSV parsing and take milliseconds. The
+        cache is rebuilt whenever the source content changes (a touched but identical
+        file only refreshes the recorded mtime).
+
+        A rebuild never writes into files another process may have mapped: the arrays
+        go to a fresh `data-*` directory, built under a temporary name and renamed into
+        place, and meta.json is then switched to it with os.replace. Concurrent
+        rebuilds each publish a complete directory; the last meta.json wins.
+        """
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        cache_dir = cache_dir or self.file_path + '.cache'
+        meta_path = os.path.join(cache_dir, 'meta.json')
+        stat = os.stat(self.file_path)
+        
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if (meta.get('version') != CACHE_VERSION or meta.get('size') != stat.st_size
+                    or meta.get('format') != self._format()):
+                meta = None
+            elif meta.get('mtime') != stat.st_mtime:
+                if meta.get('sha256') == _file_sha256(self.file_path):
+                    meta['mtime'] = stat.st_mtime
+                    _write_json(meta_path, meta)
+                else:
+                    meta = None
+                    
+        if meta is not None:
+            data_dir = os.path.join(cache_dir, meta['data_dir'])
+            try:
+                arrays = {name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+                          for name in ('indptr', 'indices', 'data', 'timestamps', 'user_ids', 'item_ids')}
+            except FileNotFoundError:
+                arrays = None  # replaced by two rebuilds since meta.json was read; build our own
+            if arrays is not None:
+                self.user_ids, self.item_ids = arrays['user_ids'], arrays['item_ids']
+                self.n_users, self.n_items = len(self.user_ids), len(self.item_ids)
+                self._maps = {}
+                matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                    shape=(self.n_users, self.n_items), copy=False)
+                return matrix, arrays['timestamps']
+            
+        matrix, timestamps = self.get_csr_with_timestamps()
+        arrays = {'indptr': matrix.indptr, 'indices': matrix.indices, 'data': matrix.data,
+                  'timestamps': timestamps, 'user_ids': self.user_ids, 'item_ids': self.item_ids}
+        self._write_cache(cache_dir, arrays, {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                                              'sha256': _file_sha256(self.file_path), 'format': self._format()})
+        return matrix, timestamps
+
+    @staticmethod
+    def _write_cache(cache_dir: str, arrays: Dict[str, np.ndarray], meta: dict) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        meta_path = os.path.join(cache_dir, 'meta.json')
+        previous = _read_json(meta_path).get('data_dir')
+        
+        build_dir = tempfile.mkdtemp(prefix='.build-', dir=cache_dir)
+        for name, array in arrays.items():
+            # Object ids (strings) would need pickle and could not be memory-mapped
+            np.save(os.path.join(build_dir, f"{name}.npy"), array.astype(str) if array.dtype == object else array)
+        meta['data_dir'] = 'data-' + os.path.basename(build_dir)[len('.build-'):]
+        os.rename(build_dir, os.path.join(cache_dir, meta['data_dir']))
+        # meta.json is switched last, so an interrupted build is never taken as valid
+        _write_json(meta_path, meta)
+        
+        # The previous directory stays for readers that have just read the old meta.json;
+        # unlinking older ones is safe even while they are still mapped
+        for entry in os.listdir(cache_dir):
+            if entry in (meta['data_dir'], previous):
+                continue
+            if entry.startswith('data-'):
+                shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+            elif entry.endswith('.npy'):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(cache_dir, entry))  # layout before CACHE_VERSION 2
+
+    def _format(self) -> dict:
+        """How the source is parsed; a cache built with different settings is not reused."""
+        dtypes = {}
+        for column, dtype in sorted(self.dtypes.items()):
+            try:
+                dtypes[column] = np.dtype(dtype).name
+            except TypeError:
+                dtypes[column] = str(dtype)  # e.g. 'category'
+        return {'sep': self.sep, 'names': list(self.names), 'dtypes': dtypes}
+
+    def get_id_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the raw user and item ids ordered by matrix index (inverse of the mappings)."""
+        # load_streaming/load_cached fill the ids without a DataFrame; only parse when nothing is loaded
+        if not len(self.user_ids) and not len(self.item_ids):
+            self.build_mappings()
+
+        return self.user_ids, self.item_ids
+
     def get_sparse_interaction_list(self) -> list:
-        """Returns list of (user_idx, item_idx, rating) tuples."""
+        """Returns list of (user_idx, item_idx, rating) tuples (slow; prefer get_csr_matrix)."""
         if self.df is None or 'user_idx' not in self.df.columns:
             self.build_mappings()
             
         return list(zip(self.df['user_idx'], self.df['item_idx'], self.df['rating']))
 
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_json(path: str, data: dict) -> None:
+    # Per-process temp name: concurrent writers must not interleave in one file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class _IncrementalIndex:
+    """Maps raw ids to consecutive int32 codes across chunks."""
+    
+    def __init__(self):
+        self.index: Optional[pd.Index] = None
+        
+    def encode(self, ids: pd.Series) -> np.ndarray:
+        if self.index is None:
+            codes, uniques = pd.factorize(ids)
+            self.index = pd.Index(uniques)
+            return codes.astype(np.int32)
+        codes = self.index.get_indexer(ids)
+        new = codes < 0
+        if new.any():
+            new_codes, new_ids = pd.factorize(ids[new])
+            codes[new] = new_codes + len(self.index)
+            self.index = self.index.append(pd.Index(new_ids))
+        return codes.astype(np.int32)
+        
+    def values(self) -> np.ndarray:
+        return np.asarray(self.index if self.index is not None else [])
+
+class _TripletColumn:
+    """Append-only typed array: doubles in memory, or appends raw bytes to a file that is memory-mapped once done."""
+    
+    def __init__(self, dtype, spill_dir: Optional[str], name: str):
+        self.dtype = np.dtype(dtype)
+        self.size = 0
+        self.path = os.path.join(spill_dir, f"{name}.bin") if spill_dir else None
+        self.buffer = None if self.path else np.empty(1024, dtype=self.dtype)
+        if self.path:
+            open(self.path, 'wb').close()
+            
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        if self.path:
+            with open(self.path, 'ab') as f:
+                values.tofile(f)
+        else:
+            if self.size + len(values) > len(self.buffer):
+                grown = np.empty(max(2 * len(self.buffer), self.size + len(values)), dtype=self.dtype)
+                grown[:self.size] = self.buffer[:self.size]
+                self.buffer = grown
+            self.buffer[self.size:self.size + len(values)] = values
+        self.size += len(values)
+        
+    def finish(self) -> np.ndarray:
+        if self.path:
+            if self.size == 0:
+                return np.empty(0, dtype=self.dtype)
+            return np.memmap(self.path, dtype=self.dtype, mode='r', shape=(self.size,))
+        return self.buffer[:self.size]
+
 if __name__ == "__main__":
     # Example usage
     # Create a dummy file for testing
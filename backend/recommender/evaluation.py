@@ -0,0 +1,124 @@
+import numpy as np
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+from typing import Dict, Optional
+
+from .parallel_engine import _resolve_n_jobs
+
+logger = logging.getLogger("Evaluation")
+
+def rmse(U: np.ndarray, V: np.ndarray, test) -> float:
+    """RMSE over every stored entry of the test matrix, in one vectorized pass."""
+    coo = csr_matrix(test).tocoo()
+    if coo.nnz == 0:
+        return float("nan")
+    err = coo.data - np.einsum('ij,ij->i', U[coo.row], V[coo.col])
+    return float(np.sqrt(err @ err / coo.nnz))
+
+def ranking_metrics(U: np.ndarray, V: np.ndarray, train, test, k: int = 10, block_size: int = 1024,
+                    threshold: Optional[float] = None, n_jobs: int = 1) -> Dict[str, float]:
+    """
+    Precision@k, recall@k, NDCG@k and hit rate@k averaged over users with at least one
+    relevant test item. Users are scored a block at a time (U[block] @ V.T) with their
+    training items masked, so memory stays at block_size x n_items. A test entry is
+    relevant when its value exceeds threshold (any stored entry if None).
+    n_jobs > 1 scores blocks in worker processes.
+    """
+    train, test = csr_matrix(train), csr_matrix(test)
+    if train.shape != test.shape or train.shape != (U.shape[0], V.shape[0]):
+        raise ValueError(f"train {train.shape}, test {test.shape} and factors ({U.shape[0]}, {V.shape[0]}) must agree")
+    if threshold is not None:
+        test = csr_matrix(test.multiply(test > threshold))
+    test.eliminate_zeros()
+    users = np.flatnonzero(np.diff(test.indptr) > 0)
+    blocks = [users[i:i + block_size] for i in range(0, len(users), block_size)]
+
+    n_jobs = _resolve_n_jobs(n_jobs)
+    if n_jobs > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(U, V, train, test, k)) as executor:
+            partials = list(executor.map(_evaluate_block, blocks))
+    else:
+        partials = [_score_block(U, V, train, test, k, block) for block in blocks]
+
+    totals = np.sum(partials, axis=0) if partials else np.zeros(4)
+    n_users = max(len(users), 1)
+    return {
+        f"precision@{k}": float(totals[0] / n_users),
+        f"recall@{k}": float(totals[1] / n_users),
+        f"ndcg@{k}": float(totals[2] / n_users),
+        f"hit_rate@{k}": float(totals[3] / n_users),
+        "n_users": int(len(users)),
+    }
+
+def evaluate(model, train, test, k: int = 10, n_jobs: int = 1, **kwargs) -> Dict[str, float]:
+    """RMSE plus ranking metrics of a trained ALSRecommender on held-out ratings."""
+    start = time.time()
+    results = {"rmse": rmse(model.U, model.V, test)}
+    results.update(ranking_metrics(model.U, model.V, train, test, k=k, n_jobs=n_jobs, **kwargs))
+    logger.info(f"Evaluated {results['n_users']} users in {time.time() - start:.2f}s")
+    return results
+
+def _score_block(U, V, train, test, k, block) -> np.ndarray:
+    """Returns the block's summed [precision, recall, ndcg, hit] contributions."""
+    n_items = V.shape[0]
+    scores = U[block] @ V.T
+    rated = train[block]
+    rated_rows = np.repeat(np.arange(rated.shape[0]), np.diff(rated.indptr))
+    scores[rated_rows, rated.indices] = -np.inf
+
+    n = min(k, n_items)
+    top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+
+    relevant = test[block]
+    hits = np.zeros((len(block), n_items), dtype=bool)
+    hits[np.repeat(np.arange(len(block)), np.diff(relevant.indptr)), relevant.indices] = True
+    hits = np.take_along_axis(hits, top, axis=1)
+
+    n_relevant = np.diff(relevant.indptr)
+    n_hits = hits.sum(axis=1)
+    discounts = 1.0 / np.log2(np.arange(2, n + 2))
+    dcg = hits @ discounts
+    idcg = np.cumsum(discounts)[np.minimum(n_relevant, n) - 1]
+    return np.array([
+        (n_hits / k).sum(),
+        (n_hits / n_relevant).sum(),
+        (dcg / idcg).sum(),
+        (n_hits > 0).sum(),
+    ])
+
+_worker_state = {}
+
+def _init_worker(U, V, train, test, k):
+    # Shipped once per worker process instead of once per block
+    _worker_state.update(U=U, V=V, train=train, test=test, k=k)
+
+def _evaluate_block(block):
+    s = _worker_state
+    return _score_block(s["U"], s["V"], s["train"], s["test"], s["k"], block)
+
+if __name__ == "__main__":
+    import argparse
+    from .dataset_loader import DatasetLoader
+    from .preprocess import Preprocessor
+    from .als_ncg import ALSRecommender
+
+    parser = argparse.ArgumentParser(description="Offline evaluation of ALSRecommender on a ratings file.")
+    parser.add_argument("ratings", help="e.g. ml-100k/u.data")
+    parser.add_argument("--sep", default="\t")
+    parser.add_argument("--factors", type=int, default=20)
+    parser.add_argument("--iters", type=int, default=10)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    matrix, timestamps = DatasetLoader(args.ratings, sep=args.sep).load_cached()
+    train, test = Preprocessor.random_split_sparse(matrix, test_size=0.2)
+    model = ALSRecommender(n_factors=args.factors, max_iter=args.iters, n_similar=0)
+    model.fit(train)
+    for name, value in evaluate(model, train, test, k=args.k, n_jobs=args.n_jobs).items():
+        print(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
@@ -8,6 +8,31 @@ try:
 except ImportError:
     HAS_NUMBA = False
 
+if HAS_NUMBA:
+    # Defined once at import time; numba compiles it lazily on the first launch
+    @cuda.jit
+    def sgd_kernel(U, V, rows, cols, data, lr, reg):
+        idx = cuda.grid(1)
+        if idx < rows.shape[0]:
+            u_idx = rows[idx]
+            v_idx = cols[idx]
+            rating = data[idx]
+            
+            # Dot product
+            prediction = 0.0
+            for k in range(U.shape[1]):
+                prediction += U[u_idx, k] * V[v_idx, k]
+                
+            error = rating - prediction
+            
+            # Update
+            for k in range(U.shape[1]):
+                u_val = U[u_idx, k]
+                v_val = V[v_idx, k]
+                
+                U[u_idx, k] += lr * (error * v_val - reg * u_val)
+                V[v_idx, k] += lr * (error * u_val - reg * v_val)
+
 class GPUEngine:
     def __init__(self):
         self.enabled = False
@@ -38,29 +63,6 @@ class GPUEngine:
         if not HAS_NUMBA:
             return U, V
             
-        @cuda.jit
-        def sgd_kernel(U, V, rows, cols, data, lr, reg):
-            idx = cuda.grid(1)
-            if idx < rows.shape[0]:
-                u_idx = rows[idx]
-                v_idx = cols[idx]
-                rating = data[idx]
-                
-                # Dot product
-                prediction = 0.0
-                for k in range(U.shape[1]):
-                    prediction += U[u_idx, k] * V[v_idx, k]
-                    
-                error = rating - prediction
-                
-                # Update
-                for k in range(U.shape[1]):
-                    u_val = U[u_idx, k]
-                    v_val = V[v_idx, k]
-                    
-                    U[u_idx, k] += lr * (error * v_val - reg * u_val)
-                    V[v_idx, k] += lr * (error * u_val - reg * v_val)
-
         # Copy to device
         d_U = cuda.to_device(U)
         d_V = cuda.to_device(V)
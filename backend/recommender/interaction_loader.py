@@ -0,0 +1,105 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+# Relative strength of each tracked event as implicit feedback.
+# 'search' rows carry no product_id, so they never reach the matrix.
+INTERACTION_WEIGHTS = {"view": 1.0, "click": 3.0, "search": 0.5}
+
+# Ids per IN (...) clause; SQLite allows at most 999 bound parameters per statement
+SQL_IN_CHUNK = 900
+
+class InteractionLoader:
+    """
+    Builds a weighted user x product CSR matrix from the `Interaction` table
+    for implicit-feedback training (`ALSRecommender(implicit=True)`).
+    
+    Aggregation happens in one GROUP BY query, so no ORM objects are created;
+    the result rows are turned into index arrays with NumPy.
+    """
+    
+    def __init__(self, session, weights: Optional[Dict[str, float]] = None):
+        self.session = session
+        self.weights = weights or INTERACTION_WEIGHTS
+        self.n_users = 0
+        self.n_items = 0
+        self.user_ids = np.empty(0, dtype=np.int64)  # matrix row -> User.id
+        self.item_ids = np.empty(0, dtype=np.int64)  # matrix column -> Product.id
+
+    def load(self) -> csr_matrix:
+        """Returns the interaction matrix; rows/columns map back through user_ids/item_ids."""
+        from sqlalchemy import select, func, case
+        from ..api.models import Interaction
+        
+        weight = case(
+            *[(Interaction.type == kind, w) for kind, w in self.weights.items()],
+            else_=0.0,
+        )
+        stmt = (
+            select(Interaction.user_id, Interaction.product_id, func.sum(weight))
+            .where(Interaction.product_id.isnot(None))
+            .where(Interaction.user_id != 0)  # 0 is the shared anonymous user
+            .group_by(Interaction.user_id, Interaction.product_id)
+        )
+        rows = self.session.execute(stmt).all()
+        
+        triples = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        self.user_ids, user_idx = np.unique(triples[:, 0].astype(np.int64), return_inverse=True)
+        self.item_ids, item_idx = np.unique(triples[:, 1].astype(np.int64), return_inverse=True)
+        self.n_users = len(self.user_ids)
+        self.n_items = len(self.item_ids)
+        
+        keep = triples[:, 2] > 0
+        return csr_matrix(
+            (triples[keep, 2], (user_idx[keep], item_idx[keep])),
+            shape=(self.n_users, self.n_items),
+        )
+
+    def item_metadata(self, window_days: float = 7.0) -> Dict[str, np.ndarray]:
+        """
+        Per-column catalog arrays for ALSRecommender.set_item_metadata: Product rating,
+        reviews and category, plus each product's interaction count (anonymous included)
+        over the last window_days for the trending list. Call after load().
+        """
+        from sqlalchemy import select, func
+        from ..api.models import Interaction, Product
+        
+        rating = np.full(self.n_items, np.nan)
+        reviews = np.zeros(self.n_items)
+        category = np.full(self.n_items, "", dtype=object)
+        recent = np.zeros(self.n_items)
+        
+        products = []
+        for start in range(0, self.n_items, SQL_IN_CHUNK):
+            chunk = self.item_ids[start:start + SQL_IN_CHUNK].tolist()
+            products += self.session.execute(
+                select(Product.id, Product.rating, Product.reviews, Product.category)
+                .where(Product.id.in_(chunk))
+            ).all()
+        for product_id, product_rating, product_reviews, product_category in products:
+            col = np.searchsorted(self.item_ids, product_id)
+            rating[col] = np.nan if product_rating is None else product_rating
+            reviews[col] = product_reviews or 0
+            category[col] = product_category or ""
+        
+        since = datetime.utcnow() - timedelta(days=window_days)
+        counts = self.session.execute(
+            select(Interaction.product_id, func.count())
+            .where(Interaction.product_id.isnot(None))
+            .where(Interaction.timestamp >= since)
+            .group_by(Interaction.product_id)
+        ).all()
+        for product_id, count in counts:
+            col = np.searchsorted(self.item_ids, product_id)
+            if col < self.n_items and self.item_ids[col] == product_id:
+                recent[col] = count
+        
+        return {"rating": rating, "reviews": reviews, "category": category, "recent": recent}
+
+    def user_index(self, user_id: int) -> Optional[int]:
+        """Matrix row of a `User.id`, or None if the user has no interactions."""
+        pos = int(np.searchsorted(self.user_ids, user_id))
+        if pos < self.n_users and self.user_ids[pos] == user_id:
+            return pos
+        return None
@@ -0,0 +1,54 @@
+import numpy as np
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger("Item-Similarity")
+
+def top_k_cosine_neighbours(V: np.ndarray, k: int = 20, block_size: int = 1024,
+                            rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours of every item (row of V), excluding the item itself.
+    With `rows`, only those items' lists are computed (against the whole catalog).
+    Scores one block of items against the catalog per matrix multiply, so peak memory
+    is block_size x n_items instead of n_items^2.
+    Returns (neighbours int32 [n_rows, k], similarities float16 [n_rows, k]), best first.
+    Rows of items with fewer than k other items are padded with -1 / 0; items whose
+    factors are all zero (e.g. just appended, not solved yet) get no neighbours.
+    """
+    V = np.asarray(V, dtype=np.float64)
+    n_items = V.shape[0]
+    norms = np.linalg.norm(V, axis=1)
+    normalized = V / np.where(norms > 0, norms, 1.0)[:, np.newaxis]
+
+    rows = np.arange(n_items) if rows is None else np.asarray(rows, dtype=np.int64)
+    k_eff = min(k, n_items - 1)
+    neighbours = np.full((len(rows), k), -1, dtype=np.int32)
+    similarities = np.zeros((len(rows), k), dtype=np.float16)
+    if k_eff <= 0:
+        return neighbours, similarities
+
+    for start in range(0, len(rows), block_size):
+        end = min(start + block_size, len(rows))
+        block = rows[start:end]
+        sims = normalized[block] @ normalized.T
+        sims[np.arange(end - start), block] = -np.inf
+
+        top = np.argpartition(-sims, k_eff - 1, axis=1)[:, :k_eff]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        neighbours[start:end, :k_eff] = np.take_along_axis(top, order, axis=1)
+        similarities[start:end, :k_eff] = np.take_along_axis(top_sims, order, axis=1)
+        zero = np.flatnonzero(norms[block] == 0) + start
+        neighbours[zero], similarities[zero] = -1, 0
+
+    if len(rows) > 1:  # single rows are looked up per request
+        logger.info(f"Precomputed {k_eff} neighbours for {len(rows)} items")
+    return neighbours, similarities
+
+if __name__ == "__main__":
+    import time
+
+    V = np.random.default_rng(0).normal(size=(20000, 20))
+    start = time.time()
+    neighbours, similarities = top_k_cosine_neighbours(V, k=20)
+    print(f"20000 items: {time.time() - start:.2f}s, {neighbours.nbytes + similarities.nbytes} bytes")
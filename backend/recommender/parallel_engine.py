@@ -15,40 +15,25 @@ def solve_chunk(chunk_indices, fixed_matrix, ratings_matrix, regularization):
     Returns:
         List of tuples (index, new_vector)
     """
-    # Precompute XtX + lambda * I
-    YtY = fixed_matrix.T @ fixed_matrix
-    lambda_I = regularization * np.eye(YtY.shape[0])
+    from scipy.sparse import csr_matrix
     
-    results = []
+    if not isinstance(ratings_matrix, csr_matrix):
+        ratings_matrix = csr_matrix(ratings_matrix)
+    chunk_indices = np.asarray(chunk_indices, dtype=np.int64)
     
-    # For each vector in the chunk
-    for idx in chunk_indices:
-        # Get ratings for this user/item
-        # ratings_matrix is expected to be indexable by [idx, :] returning a sparse row/col
-        # For efficiency, we assume ratings_matrix is passed in a way that allows fast access
-        # Or we pass the specific ratings data for this chunk.
-        
-        # Simplified: assuming dense row access or pre-sliced data is better for IPC
-        # But for this example, we'll assume we have access to the data.
-        # In a real large-scale system, we'd use shared memory or pass only non-zero entries.
-        
-        # Let's assume ratings_matrix is a dense row/col for simplicity in this snippet,
-        # or a sparse representation.
-        
-        # To make it truly parallel friendly without huge serialization overhead, 
-        # we usually pass the raw data needed.
-        pass 
-        
-    # NOTE: Passing the entire ratings_matrix to subprocesses is inefficient.
-    # A better approach for `multiprocessing` is to use `shared_memory` or pass only the necessary data.
-    # However, for the sake of this "laptop-friendly" request, we will implement a 
-    # simpler version where we solve linear systems using numpy's lstsq or solve.
+    # Precompute YtY once; rows denser than half the catalog start from it
+    YtY = fixed_matrix.T @ fixed_matrix
+    new_vectors = _solve_rows_batched(
+        chunk_indices, fixed_matrix, ratings_matrix.indptr, ratings_matrix.indices,
+        ratings_matrix.data, regularization, YtY=YtY
+    )
     
-    return results
+    return list(zip(chunk_indices.tolist(), new_vectors))
 
-def update_user_factors_parallel(U, V, ratings, regularization, n_jobs=-1):
+def update_user_factors_parallel(U, V, ratings, regularization, n_jobs=-1, alpha=None):
     """
     Parallel update of user factors.
+    With `alpha` set, ratings are implicit-feedback weights (confidence 1 + alpha * r).
     """
     n_users, n_factors = U.shape
     if n_jobs == -1:
@@ -86,16 +71,33 @@ def update_user_factors_parallel(U, V, ratings, regularization, n_jobs=-1):
     # This requires a different matrix inversion per user! Very expensive.
     # Parallelization is key here.
     
-    return _parallel_als_step(U, V, ratings, regularization, n_jobs, is_user=True)
+    return _parallel_als_step(U, V, ratings, regularization, n_jobs, is_user=True, alpha=alpha)
 
-def update_item_factors_parallel(U, V, ratings, regularization, n_jobs=-1):
-    return _parallel_als_step(V, U, ratings.T, regularization, n_jobs, is_user=False)
+def update_item_factors_parallel(U, V, ratings, regularization, n_jobs=-1, alpha=None):
+    return _parallel_als_step(V, U, ratings.T, regularization, n_jobs, is_user=False, alpha=alpha)
 
 def _solve_batch(args):
     """
     Worker function to solve a batch of linear systems.
     """
-    indices, fixed_matrix, ratings_csr, regularization = args
+    indices, fixed_matrix, ratings_csr, regularization, alpha, YtY = args
+    if alpha is None:
+        new_vectors = _solve_rows_batched(
+            indices, fixed_matrix, ratings_csr.indptr, ratings_csr.indices, ratings_csr.data, regularization
+        )
+    else:
+        new_vectors = _solve_rows_implicit(
+            indices, fixed_matrix, ratings_csr.indptr, ratings_csr.indices, ratings_csr.data,
+            regularization, alpha, YtY=YtY
+        )
+    return indices, new_vectors
+
+def _solve_rows(indices, fixed_matrix, indptr, col_indices, values, regularization):
+    """
+    Solves the regularized least squares system for each row in `indices`,
+    reading the row's ratings straight from raw CSR arrays.
+    Rows without ratings are left as zeros.
+    """
     n_factors = fixed_matrix.shape[1]
     lambda_I = regularization * np.eye(n_factors)
     
@@ -103,15 +105,14 @@ def _solve_batch(args):
     
     for i, idx in enumerate(indices):
         # Get indices of items rated by this user (or users who rated this item)
-        # ratings_csr is a scipy.sparse.csr_matrix
-        start_ptr = ratings_csr.indptr[idx]
-        end_ptr = ratings_csr.indptr[idx+1]
+        start_ptr = indptr[idx]
+        end_ptr = indptr[idx+1]
         
         if start_ptr == end_ptr:
             continue
             
-        cols = ratings_csr.indices[start_ptr:end_ptr]
-        data = ratings_csr.data[start_ptr:end_ptr]
+        cols = col_indices[start_ptr:end_ptr]
+        data = values[start_ptr:end_ptr]
         
         # Select rows from fixed_matrix corresponding to rated items
         V_subset = fixed_matrix[cols, :]
@@ -126,9 +127,277 @@ def _solve_batch(args):
         x = np.linalg.solve(A, b)
         new_vectors[i] = x
         
-    return indices, new_vectors
+    return new_vectors
+
+# Upper bound on gathered factor entries (rows x padded length x factors) per stacked solve
+_BATCH_BUDGET = 1 << 20
+
+def _solve_rows_batched(indices, fixed_matrix, indptr, col_indices, values, regularization, YtY=None):
+    """
+    Vectorized equivalent of `_solve_rows`.
+    
+    Rows are bucketed by nnz (rounded up to a power of two) and padded with an
+    all-zero factor row, so every bucket's Gram matrices come from one batched
+    matmul and are solved with one stacked `np.linalg.solve`. Rows rating more
+    than half of the fixed side use YtY - Y_unrated.T @ Y_unrated instead,
+    which only touches the (shorter) complement.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    n_fixed, n_factors = fixed_matrix.shape
+    new_vectors = np.zeros((len(indices), n_factors))
+    if len(indices) == 0:
+        return new_vectors
+    
+    starts = np.asarray(indptr[indices], dtype=np.int64)
+    lengths = np.asarray(indptr[indices + 1], dtype=np.int64) - starts
+    padded = np.vstack([fixed_matrix, np.zeros((1, n_factors), dtype=fixed_matrix.dtype)])
+    
+    dense = lengths > n_fixed - lengths
+    sparse_rows = np.flatnonzero((lengths > 0) & ~dense)
+    dense_rows = np.flatnonzero(dense)
+    lambda_I = regularization * np.eye(n_factors)
+    
+    for chunk, A, b in _iter_bucketed_gram(padded, col_indices, values, starts, lengths, sparse_rows):
+        A += lambda_I
+        new_vectors[chunk] = np.linalg.solve(A, b[..., np.newaxis])[..., 0]
+    
+    if len(dense_rows):
+        if YtY is None:
+            YtY = fixed_matrix.T @ fixed_matrix
+        # Mark the rated columns of every dense row, then gather what is left
+        rated_cols = _gather_segments(col_indices, starts[dense_rows], lengths[dense_rows])
+        rated_rows = np.repeat(np.arange(len(dense_rows)), lengths[dense_rows])
+        unrated = np.ones((len(dense_rows), n_fixed), dtype=bool)
+        unrated[rated_rows, rated_cols] = False
+        comp_rows, comp_cols = np.nonzero(unrated)
+        comp_lengths = np.bincount(comp_rows, minlength=len(dense_rows))
+        comp_starts = np.concatenate(([0], np.cumsum(comp_lengths)[:-1]))
+        
+        A_dense = np.broadcast_to(YtY + lambda_I, (len(dense_rows), n_factors, n_factors)).copy()
+        has_comp = np.flatnonzero(comp_lengths > 0)
+        for chunk, A_comp, _ in _iter_bucketed_gram(padded, comp_cols, None, comp_starts, comp_lengths, has_comp):
+            A_dense[chunk] -= A_comp
+        
+        rated_values = _gather_segments(values, starts[dense_rows], lengths[dense_rows])
+        weighted = fixed_matrix[rated_cols] * rated_values[:, np.newaxis]
+        segment_starts = np.concatenate(([0], np.cumsum(lengths[dense_rows])[:-1]))
+        b_dense = np.add.reduceat(weighted, segment_starts, axis=0)
+        new_vectors[dense_rows] = np.linalg.solve(A_dense, b_dense[..., np.newaxis])[..., 0]
+    
+    return new_vectors
+
+def _solve_rows_implicit(indices, fixed_matrix, indptr, col_indices, values, regularization, alpha, YtY=None):
+    """
+    Implicit-feedback ALS (Hu, Koren & Volinsky) for each row in `indices`.
+    
+    Every unobserved entry has preference 0 and confidence 1, so
+    A = YtY + Y_r.T @ diag(alpha * r) @ Y_r + lambda * I and b = Y_r.T @ (1 + alpha * r).
+    Starting from the shared YtY keeps the cost per row proportional to its nnz.
+    Rows without interactions solve to zero.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    n_factors = fixed_matrix.shape[1]
+    new_vectors = np.zeros((len(indices), n_factors))
+    if len(indices) == 0:
+        return new_vectors
+    if YtY is None:
+        YtY = fixed_matrix.T @ fixed_matrix
+    
+    starts = np.asarray(indptr[indices], dtype=np.int64)
+    lengths = np.asarray(indptr[indices + 1], dtype=np.int64) - starts
+    padded = np.vstack([fixed_matrix, np.zeros((1, n_factors), dtype=fixed_matrix.dtype)])
+    base = YtY + regularization * np.eye(n_factors)
+    
+    active = np.flatnonzero(lengths > 0)
+    for chunk, A, b in _iter_bucketed_gram(padded, col_indices, values, starts, lengths, active, alpha=alpha):
+        A += base
+        new_vectors[chunk] = np.linalg.solve(A, b[..., np.newaxis])[..., 0]
+    
+    return new_vectors
+
+def _gather_segments(array, starts, lengths):
+    """Concatenates array[start:start + length] for every (start, length) pair without a Python loop."""
+    total = int(lengths.sum())
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return array[np.arange(total) + offsets]
+
+def _iter_bucketed_gram(padded, col_indices, values, starts, lengths, rows, alpha=None):
+    """
+    Yields (chunk, A, b) where A[j] = Y_r.T @ Y_r and b[j] = Y_r.T @ r for row r = chunk[j].
+    Rows are grouped into power-of-two nnz buckets so each chunk is one batched matmul;
+    b is None when no values are given.
+    With `alpha` set (implicit feedback), A[j] = Y_r.T @ diag(alpha * r) @ Y_r and
+    b[j] = Y_r.T @ (1 + alpha * r) instead.
+    """
+    if len(rows) == 0:
+        return
+    pad_index = padded.shape[0] - 1
+    n_factors = padded.shape[1]
+    bucket_of = np.ceil(np.log2(lengths[rows])).astype(np.int64)
+    
+    for bucket in np.unique(bucket_of):
+        bucket_rows = rows[bucket_of == bucket]
+        width = 1 << int(bucket)
+        step = max(1, _BATCH_BUDGET // (width * n_factors))
+        offsets = np.arange(width)
+        
+        for chunk_start in range(0, len(bucket_rows), step):
+            chunk = bucket_rows[chunk_start:chunk_start + step]
+            positions = starts[chunk][:, np.newaxis] + offsets
+            valid = offsets < lengths[chunk][:, np.newaxis]
+            positions = np.where(valid, positions, 0)
+            
+            F = padded[np.where(valid, col_indices[positions], pad_index)]
+            FT = F.transpose(0, 2, 1)
+            b = None
+            if values is None:
+                yield chunk, FT @ F, b
+                continue
+            
+            r = np.where(valid, values[positions], 0.0)
+            if alpha is None:
+                b = (FT @ r[..., np.newaxis])[..., 0]
+                yield chunk, FT @ F, b
+            else:
+                # Padding slots gather the zero factor row, so they add nothing to b
+                b = (FT @ (1.0 + alpha * r)[..., np.newaxis])[..., 0]
+                yield chunk, (FT * (alpha * r)[:, np.newaxis, :]) @ F, b
+
+# Shared memory segments attached by each pool worker, keyed by array name
+_SHARED_ARRAYS = {}
+_SHARED_SEGMENTS = []
+
+def _attach_shared(spec):
+    """Process pool initializer: maps every shared segment described in `spec` once per worker."""
+    from multiprocessing import shared_memory
+    
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SHARED_SEGMENTS.append(shm)
+        _SHARED_ARRAYS[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _solve_shared(args):
+    """
+    Worker function for the process backend.
+    Solves rows [start, end) of one side and writes them into the shared output factors.
+    """
+    side, start, end, regularization, alpha, YtY = args
+    if side == "user":
+        prefix, fixed, out = "R", _SHARED_ARRAYS["V"], _SHARED_ARRAYS["U"]
+    else:
+        prefix, fixed, out = "Rt", _SHARED_ARRAYS["U"], _SHARED_ARRAYS["V"]
+    
+    csr = (
+        _SHARED_ARRAYS[prefix + "_indptr"],
+        _SHARED_ARRAYS[prefix + "_indices"],
+        _SHARED_ARRAYS[prefix + "_data"],
+    )
+    if alpha is None:
+        out[start:end] = _solve_rows_batched(range(start, end), fixed, *csr, regularization)
+    else:
+        out[start:end] = _solve_rows_implicit(range(start, end), fixed, *csr, regularization, alpha, YtY=YtY)
+    return end - start
+
+class SharedMemoryALS:
+    """
+    Process-pool ALS solver that sidesteps the GIL.
+    
+    The ratings (as CSR for users and for items) and both factor matrices are copied
+    into `multiprocessing.shared_memory` once per fit. Workers attach to them in the
+    pool initializer, so tasks only carry (side, start, end, lambda, alpha, YtY) and
+    solved rows are written in place instead of being pickled back.
+    """
+    
+    def __init__(self, ratings_csr, U, V, n_jobs=-1, chunks_per_job=4, alpha=None):
+        from scipy.sparse import csr_matrix
+        
+        if not isinstance(ratings_csr, csr_matrix):
+            ratings_csr = ratings_csr.tocsr()
+        ratings_t = ratings_csr.T.tocsr()
+        
+        self.n_jobs = _resolve_n_jobs(n_jobs)
+        self.chunks_per_job = chunks_per_job
+        self.alpha = alpha
+        self._segments = []
+        self._arrays = {}
+        spec = {}
+        
+        for name, arr in (
+            ("R_indptr", ratings_csr.indptr), ("R_indices", ratings_csr.indices), ("R_data", ratings_csr.data),
+            ("Rt_indptr", ratings_t.indptr), ("Rt_indices", ratings_t.indices), ("Rt_data", ratings_t.data),
+            ("U", U), ("V", V),
+        ):
+            spec[name] = self._share(name, np.ascontiguousarray(arr))
+        
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.n_jobs, initializer=_attach_shared, initargs=(spec,)
+        )
+    
+    @property
+    def U(self):
+        return self._arrays["U"]
+    
+    @property
+    def V(self):
+        return self._arrays["V"]
+    
+    def _share(self, name, arr):
+        from multiprocessing import shared_memory
+        
+        # Zero-sized segments are not allowed, so always reserve at least one byte
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self._segments.append(shm)
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        view[...] = arr
+        self._arrays[name] = view
+        return shm.name, arr.shape, arr.dtype.str
+    
+    def _run(self, side, n_rows, regularization):
+        n_chunks = max(1, min(n_rows, self.n_jobs * self.chunks_per_job))
+        chunk_size = (n_rows + n_chunks - 1) // n_chunks
+        # Implicit feedback shares one YtY (n_factors x n_factors, cheap to ship) across every chunk
+        fixed = self.V if side == "user" else self.U
+        YtY = fixed.T @ fixed if self.alpha is not None else None
+        tasks = [
+            (side, start, min(start + chunk_size, n_rows), regularization, self.alpha, YtY)
+            for start in range(0, n_rows, chunk_size)
+        ]
+        # Consume the iterator so worker exceptions propagate here
+        list(self._executor.map(_solve_shared, tasks))
+    
+    def update_users(self, regularization):
+        self._run("user", self.U.shape[0], regularization)
+    
+    def update_items(self, regularization):
+        self._run("item", self.V.shape[0], regularization)
+    
+    def sweep(self, regularization):
+        self.update_users(regularization)
+        self.update_items(regularization)
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._arrays.clear()
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _resolve_n_jobs(n_jobs):
+    if n_jobs is None or n_jobs < 1:
+        try:
+            n_jobs = multiprocessing.cpu_count()
+        except NotImplementedError:
+            n_jobs = 1
+    return max(n_jobs, 1)
 
-def _parallel_als_step(Update_Matrix, Fixed_Matrix, ratings_csr, regularization, n_jobs, is_user):
+def _parallel_als_step(Update_Matrix, Fixed_Matrix, ratings_csr, regularization, n_jobs, is_user, alpha=None):
     from scipy.sparse import csr_matrix
     import multiprocessing
     
@@ -164,7 +433,9 @@ def _parallel_als_step(Update_Matrix, Fixed_Matrix, ratings_csr, regularization,
     # To make it work efficiently on Windows, we'd need to dump matrices to a file or use shared_memory.
     # For simplicity in this demo, we'll pass the data.
     
-    tasks = [(chunk, Fixed_Matrix, ratings_csr, regularization) for chunk in chunks]
+    # Implicit feedback shares one YtY across every chunk
+    YtY = Fixed_Matrix.T @ Fixed_Matrix if alpha is not None else None
+    tasks = [(chunk, Fixed_Matrix, ratings_csr, regularization, alpha, YtY) for chunk in chunks]
     
     new_matrix = np.zeros_like(Update_Matrix)
     
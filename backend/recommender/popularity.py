@@ -0,0 +1,112 @@
+import numpy as np
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger("Popularity")
+
+class PopularityTier:
+    """
+    Cold-start rankings for anonymous users and users without ratings.
+
+    Built once per fit and stored as short int32/float32 arrays of the best `max_n`
+    items, so serving is a slice: global top, top per category and trending.
+    An item's score is log1p(column sum of the training matrix) plus, when catalog
+    data is given, its review-weighted rating (IMDb formula) so that a 5-star item
+    with three reviews does not outrank an established bestseller.
+    """
+
+    def __init__(self, max_n: int = 100):
+        self.max_n = max_n
+        self.global_items = np.empty(0, dtype=np.int32)
+        self.global_scores = np.empty(0, dtype=np.float32)
+        self.category_items: Dict[Any, np.ndarray] = {}
+        self.category_scores: Dict[Any, np.ndarray] = {}
+        self.trending_items: Optional[np.ndarray] = None
+        self.trending_scores: Optional[np.ndarray] = None
+
+    def fit(self, train_matrix, rating: Optional[np.ndarray] = None, reviews: Optional[np.ndarray] = None,
+            category: Optional[np.ndarray] = None, recent: Optional[np.ndarray] = None) -> "PopularityTier":
+        """
+        train_matrix: user x item ratings/interactions (column sums = popularity).
+        rating, reviews, category, recent: optional per-item arrays aligned with the
+            columns (Product.rating, Product.reviews, Product.category and the number of
+            interactions in the trending window, e.g. from InteractionLoader.item_metadata).
+        """
+        n_items = train_matrix.shape[1]
+        scores = np.log1p(np.maximum(np.asarray(train_matrix.sum(axis=0)).ravel(), 0))
+        if rating is not None:
+            rating = np.nan_to_num(np.asarray(rating, dtype=np.float64))
+            votes = np.zeros(n_items) if reviews is None else np.nan_to_num(np.asarray(reviews, dtype=np.float64))
+            rated = votes > 0
+            prior_votes = float(np.median(votes[rated])) if rated.any() else 1.0
+            mean_rating = float(rating[rated].mean()) if rated.any() else 0.0
+            scores = scores + (votes * rating + prior_votes * mean_rating) / (votes + prior_votes)
+
+        self.global_items, self.global_scores = self._top(scores, np.arange(n_items))
+
+        self.category_items, self.category_scores = {}, {}
+        if category is not None:
+            category = np.asarray(category)
+            codes, inverse = np.unique(category.astype(str), return_inverse=True)
+            for code, name in enumerate(codes):
+                members = np.flatnonzero(inverse == code)
+                self.category_items[name], self.category_scores[name] = self._top(scores[members], members)
+
+        self.trending_items = self.trending_scores = None
+        if recent is not None:
+            recent = np.asarray(recent, dtype=np.float64)
+            active = np.flatnonzero(recent > 0)
+            # Ties in the window are broken by overall popularity
+            trend = recent[active] + scores[active] / (scores.max(initial=0.0) + 1.0)
+            self.trending_items, self.trending_scores = self._top(trend, active)
+
+        logger.info(f"Popularity tier: {len(self.global_items)} global, {len(self.category_items)} categories")
+        return self
+
+    def top(self, n_top: int, category: Optional[str] = None, trending: bool = False) -> List[Tuple[int, float]]:
+        """
+        Best n_top (item index, score) pairs. Unknown categories and an empty trending
+        window fall back to the global list.
+        """
+        items, scores = self.global_items, self.global_scores
+        if trending and self.trending_items is not None and len(self.trending_items):
+            items, scores = self.trending_items, self.trending_scores
+        elif category is not None and category in self.category_items:
+            items, scores = self.category_items[category], self.category_scores[category]
+        return [(int(i), float(s)) for i, s in zip(items[:n_top], scores[:n_top])]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flat arrays for the model artifact; categories are concatenated with offsets."""
+        names = sorted(self.category_items)
+        arrays = {
+            "global_items": self.global_items,
+            "global_scores": self.global_scores,
+            "category_names": np.array(names, dtype=str),
+            "category_offsets": np.cumsum([0] + [len(self.category_items[n]) for n in names]),
+            "category_items": np.concatenate([self.category_items[n] for n in names] + [np.empty(0, np.int32)]),
+            "category_scores": np.concatenate([self.category_scores[n] for n in names] + [np.empty(0, np.float32)]),
+        }
+        if self.trending_items is not None:
+            arrays.update(trending_items=self.trending_items, trending_scores=self.trending_scores)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], max_n: int = 100) -> "PopularityTier":
+        """Inverse of to_arrays(); the arrays may be memory-mapped (slices stay views)."""
+        tier = cls(max_n=max_n)
+        tier.global_items, tier.global_scores = arrays["global_items"], arrays["global_scores"]
+        offsets = arrays["category_offsets"]
+        for i, name in enumerate(arrays["category_names"].tolist()):
+            tier.category_items[name] = arrays["category_items"][offsets[i]:offsets[i + 1]]
+            tier.category_scores[name] = arrays["category_scores"][offsets[i]:offsets[i + 1]]
+        tier.trending_items = arrays.get("trending_items")
+        tier.trending_scores = arrays.get("trending_scores")
+        return tier
+
+    def _top(self, scores: np.ndarray, items: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = min(self.max_n, len(scores))
+        if n == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return items[top].astype(np.int32), scores[top].astype(np.float32)
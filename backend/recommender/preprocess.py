@@ -1,5 +1,7 @@
 import numpy as np
 from sklearn.model_selection import train_test_split
+from scipy.sparse import csr_matrix
+from typing import Optional, Tuple
 import pickle
 import os
 
@@ -37,6 +39,57 @@ class Preprocessor:
         """
         return train_test_split(data, test_size=test_size, random_state=random_state)
 
+    # The sparse splitters below take a CSR rating matrix (e.g. DatasetLoader.get_csr_matrix)
+    # and return (train, test) CSR matrices of the same shape. They only build boolean
+    # masks over the stored entries, so nothing is materialized as tuples.
+
+    @staticmethod
+    def random_split_sparse(matrix, test_size: float = 0.2,
+                            random_state: Optional[int] = 42) -> Tuple[csr_matrix, csr_matrix]:
+        """Holds out a uniformly random test_size fraction of all ratings."""
+        matrix = csr_matrix(matrix)
+        rng = np.random.default_rng(random_state)
+        test = np.zeros(matrix.nnz, dtype=bool)
+        test[rng.choice(matrix.nnz, int(round(test_size * matrix.nnz)), replace=False)] = True
+        return _mask_csr(matrix, ~test), _mask_csr(matrix, test)
+
+    @staticmethod
+    def leave_k_out_sparse(matrix, k: int = 1, timestamps: Optional[np.ndarray] = None,
+                           random_state: Optional[int] = 42) -> Tuple[csr_matrix, csr_matrix]:
+        """
+        Holds out k ratings per user: the k most recent when timestamps (aligned with
+        matrix.data) are given, else k random ones. Users with k or fewer ratings stay
+        entirely in train.
+        """
+        matrix = csr_matrix(matrix)
+        rng = np.random.default_rng(random_state)
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        tiebreak = rng.random(matrix.nnz)
+        keys = (tiebreak,) if timestamps is None else (tiebreak, np.asarray(timestamps))
+        # Sorted by row, then ascending key: the last k entries of each row are held out
+        order = np.lexsort(keys + (rows,))
+        row_len = np.diff(matrix.indptr)[rows[order]]
+        rank = np.arange(matrix.nnz) - matrix.indptr[rows[order]]
+        test = np.zeros(matrix.nnz, dtype=bool)
+        test[order] = (rank >= row_len - k) & (row_len > k)
+        return _mask_csr(matrix, ~test), _mask_csr(matrix, test)
+
+    @staticmethod
+    def temporal_split_sparse(matrix, timestamps: np.ndarray, test_size: float = 0.2,
+                              cutoff: Optional[float] = None) -> Tuple[csr_matrix, csr_matrix]:
+        """
+        Global time split: ratings after the cutoff go to test. Without an explicit
+        cutoff it is the (1 - test_size) quantile of the timestamps.
+        """
+        matrix = csr_matrix(matrix)
+        timestamps = np.asarray(timestamps)
+        if len(timestamps) != matrix.nnz:
+            raise ValueError("timestamps must be aligned with the matrix's stored entries")
+        if cutoff is None:
+            cutoff = np.quantile(timestamps, 1 - test_size) if len(timestamps) else 0
+        test = timestamps > cutoff
+        return _mask_csr(matrix, ~test), _mask_csr(matrix, test)
+
     @staticmethod
     def save_processed_data(data, filepath):
         """Saves data using pickle."""
@@ -50,6 +103,13 @@ class Preprocessor:
         with open(filepath, 'rb') as f:
             return pickle.load(f)
 
+def _mask_csr(matrix: csr_matrix, keep: np.ndarray) -> csr_matrix:
+    """Sub-matrix with only the stored entries where keep is True (same shape)."""
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    indptr = np.zeros(matrix.shape[0] + 1, dtype=matrix.indptr.dtype)
+    np.cumsum(np.bincount(rows[keep], minlength=matrix.shape[0]), out=indptr[1:])
+    return csr_matrix((matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+
 if __name__ == "__main__":
     # Test
     ratings = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
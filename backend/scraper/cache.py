@@ -1,57 +1,261 @@
 import redis
-import redis
 import json
 import os
-from typing import Optional, Dict, Any
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any, List, Tuple
 
 # Redis Configuration
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
 
+def get_redis_client(host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB) -> Optional[redis.Redis]:
+    """Returns a connected client, or None when Redis is not reachable."""
+    try:
+        client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+        client.ping() # Check connection
+        return client
+    except redis.ConnectionError:
+        return None
+
+def normalize_product(name: str) -> str:
+    """Case- and spacing-insensitive form of a product name, shared by all cache/lock keys."""
+    return " ".join(name.lower().split())
+
 class ScraperCache:
-    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, expiry: int = 600):
+    """
+    Two-tier price cache with stale-while-revalidate.
+
+    An in-process LRU sits in front of Redis, so repeated lookups in a worker cost no
+    round trip and the cache keeps working (locally) while Redis is unreachable; Redis
+    is retried every `retry_interval` seconds. Entries are fresh for `expiry` seconds
+    and then stale for another `stale_ttl`: a stale entry is still served when the
+    caller passes a `revalidate` function, which is run once in the background to
+    refresh it. Hit/miss counters are batched locally and flushed to
+    `metrics:cache_*` with one pipeline every `metrics_interval` seconds.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, expiry: int = 600,
+                 stale_ttl: int = 3600, max_local: int = 10000, retry_interval: float = 30.0,
+                 metrics_interval: float = 1.0, client: Optional[redis.Redis] = None):
+        self.host, self.port, self.db = host, port, db
         self.expiry = expiry
-        try:
-            self.client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
-            self.client.ping() # Check connection
-            self.enabled = True
-        except redis.ConnectionError:
-            print("Warning: Redis not available. Caching disabled.")
-            self.enabled = False
+        self.stale_ttl = stale_ttl
+        self.max_local = max_local
+        self.retry_interval = retry_interval
+        self.metrics_interval = metrics_interval
+        self.client = client if client is not None else get_redis_client(host, port, db)
+        if self.client is None:
+            print("Warning: Redis not available. Using in-process price cache only.")
+
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._retry_at = time.monotonic() + retry_interval if self.client is None else 0.0
+        self._counts: Dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+    @property
+    def enabled(self) -> bool:
+        """True while the shared Redis tier is in use."""
+        return self.client is not None and time.monotonic() >= self._retry_at
 
     def _get_key(self, site: str, product: str) -> str:
-        return f"price:{site}:{product.lower().replace(' ', '_')}"
+        return f"price:{site}:{normalize_product(product).replace(' ', '_')}"
 
-    def get_cached_price(self, site: str, product: str) -> Optional[Dict[str, Any]]:
-        if not self.enabled:
-            return None
-        
+    def get_cached_price(self, site: str, product: str,
+                         revalidate: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fresh entries are returned as is. Stale ones are returned (with 'stale': True) only
+        when `revalidate` is given, after scheduling it to refresh the entry in the background.
+        """
         key = self._get_key(site, product)
+        entry = self._local_get(key)
+        if entry is None or self._age(entry) >= self.expiry:
+            entry = self._redis_get(key) or entry
+            if entry is not None:
+                self._local_set(key, entry)
+
+        age = self._age(entry) if entry is not None else None
+        if age is not None and age < self.expiry:
+            self._count('metrics:cache_hits')
+            return dict(entry[1], source='cache')
+        if age is not None and age < self.expiry + self.stale_ttl and revalidate is not None:
+            self._count('metrics:cache_stale_hits')
+            self._schedule_refresh(key, site, product, revalidate)
+            return dict(entry[1], source='cache', stale=True)
+
+        self._count('metrics:cache_misses')
+        return None
+
+    def cache_price(self, site: str, product: str, data: Dict[str, Any]) -> None:
+        """Caches the price in both tiers; fresh for `expiry` (600s by default), then stale."""
+        key = self._get_key(site, product)
+        entry = (time.time(), data)
+        self._local_set(key, entry)
+
+        client = self._redis()
+        if client is None:
+            return
         try:
-            data = self.client.get(key)
-            if data:
-                self.client.incr('metrics:cache_hits')
-                result = json.loads(data)
-                result['source'] = 'cache'
-                return result
+            payload = json.dumps({"fetched_at": entry[0], "data": data})
+            client.setex(key, self.expiry + self.stale_ttl, payload)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def get_many(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Fresh cached offers for many (site, product) pairs: the local tier first, then one
+        MGET for the rest. Pairs without a fresh entry are left out of the result.
+        """
+        found, missing = {}, []
+        for pair in pairs:
+            key = self._get_key(*pair)
+            entry = self._local_get(key)
+            if entry is not None and self._age(entry) < self.expiry:
+                found[pair] = dict(entry[1], source='cache')
             else:
-                self.client.incr('metrics:cache_misses')
+                missing.append((pair, key))
+
+        client = self._redis() if missing else None
+        if client is not None:
+            try:
+                values = client.mget([key for _, key in missing])
+            except Exception as e:
+                self._redis_failed(e)
+                values = []
+            for (pair, key), data in zip(missing, values):
+                entry = self._decode(data)
+                if entry is not None:
+                    self._local_set(key, entry)
+                    if self._age(entry) < self.expiry:
+                        found[pair] = dict(entry[1], source='cache')
+
+        self._count('metrics:cache_hits', len(found))
+        self._count('metrics:cache_misses', len(pairs) - len(found))
+        return found
+
+    def cache_many(self, offers: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Caches many (site, product, data) offers with one pipelined SETEX batch."""
+        if not offers:
+            return
+        now = time.time()
+        for site, product, data in offers:
+            self._local_set(self._get_key(site, product), (now, data))
+
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for site, product, data in offers:
+                payload = json.dumps({"fetched_at": now, "data": data})
+                pipe.setex(self._get_key(site, product), self.expiry + self.stale_ttl, payload)
+            pipe.execute()
         except Exception as e:
-            print(f"Cache read error: {e}")
-            
-        return None
+            self._redis_failed(e)
 
-    def cache_price(self, site: str, product: str, data: Dict[str, Any]) -> None:
-        """Cache price for 10 minutes (600s) by default."""
-        if not self.enabled:
+    def flush_metrics(self) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._flushed_at = time.monotonic()
+        client = self._redis()
+        if not counts or client is None:
             return
-            
-        key = self._get_key(site, product)
         try:
-            self.client.setex(key, self.expiry, json.dumps(data))
+            pipe = client.pipeline(transaction=False)
+            for name, n in counts.items():
+                pipe.incrby(name, n)
+            pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    @staticmethod
+    def _age(entry: Tuple[float, Dict[str, Any]]) -> float:
+        return time.time() - entry[0]
+
+    def _local_get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local:
+                self._local.popitem(last=False)
+
+    def redis_client(self) -> Optional[redis.Redis]:
+        """The shared Redis client, reconnecting if due; None while Redis is unavailable."""
+        return self._redis()
+
+    def _redis(self) -> Optional[redis.Redis]:
+        if time.monotonic() < self._retry_at:
+            return None
+        if self.client is None:
+            self.client = get_redis_client(self.host, self.port, self.db)
+            if self.client is None:
+                self._retry_at = time.monotonic() + self.retry_interval
+        return self.client
+
+    def _redis_failed(self, error: Exception) -> None:
+        print(f"Cache Redis error: {error}; using in-process cache for {self.retry_interval:.0f}s")
+        self._retry_at = time.monotonic() + self.retry_interval
+
+    def _redis_get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            data = client.get(key)
         except Exception as e:
-            print(f"Cache write error: {e}")
+            self._redis_failed(e)
+            return None
+        return self._decode(data)
+
+    @staticmethod
+    def _decode(data: Optional[str]) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if not data:
+            return None
+        value = json.loads(data)
+        if "fetched_at" not in value:  # written before entries were timestamped
+            return time.time(), value
+        return value["fetched_at"], value["data"]
+
+    def _count(self, name: str, n: int = 1) -> None:
+        if n <= 0:
+            return
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + n
+            due = time.monotonic() - self._flushed_at >= self.metrics_interval
+        if due:
+            self.flush_metrics()
+
+    def _schedule_refresh(self, key, site, product, revalidate) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                data = revalidate()
+                if data:
+                    self.cache_price(site, product, data)
+            except Exception as e:
+                print(f"Cache refresh error for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
 
 # Global instance
 cache = ScraperCache(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
@@ -0,0 +1,214 @@
+import os
+import re
+import codecs
+import random
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from html.parser import HTMLParser
+from typing import Callable, List, Optional
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+logger = logging.getLogger("PriceScraper")
+
+# Statuses worth retrying (throttling and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+def parse_price(text: str) -> Optional[float]:
+    """First number in e.g. "₹1,29,999.00" or "Rs. 499"; None if there is none."""
+    match = _PRICE_RE.search(text or "")
+    return float(match.group().replace(",", "")) if match else None
+
+class PriceParser(HTMLParser):
+    """
+    Incremental parser for a store's search/product page.
+
+    It is fed the body chunk by chunk as it streams in and is `done` at the first
+    price it recognises: schema.org `itemprop="price"`, `<meta property="product:price:amount">`
+    or an element with class "price". The product name (`itemprop="name"`) and the
+    first product link seen before the price are picked up on the way.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.price: Optional[float] = None
+        self.name: Optional[str] = None
+        self.url: Optional[str] = None
+        self._capture = None  # (field, tag) whose text is being read
+        self._text: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.price is not None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        marker = attrs.get('itemprop') or attrs.get('property') or ''
+        if marker in ('price', 'product:price:amount') or 'price' in (attrs.get('class') or '').split():
+            field = 'price'
+        elif marker == 'name' and self.name is None:
+            field = 'name'
+        else:
+            if tag == 'a' and marker == 'url' and self.url is None:
+                self.url = attrs.get('href')
+            return
+
+        if attrs.get('content'):
+            self._set(field, attrs['content'])
+        elif self._capture is None:
+            self._capture, self._text = (field, tag), []
+
+    def handle_data(self, data):
+        # Text can arrive in pieces when a chunk boundary splits it
+        if self._capture:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if self._capture and self._capture[1] == tag:
+            field, self._capture = self._capture[0], None
+            self._set(field, "".join(self._text))
+
+    def _set(self, field, text):
+        if field == 'price':
+            self.price = parse_price(text)
+        elif text.strip():
+            self.name = text.strip()
+
+class AsyncHTTPFetcher:
+    """
+    Pooled HTTP client for store pages.
+
+    One event loop runs in a daemon thread and owns a single aiohttp.ClientSession,
+    so every fetch from this process (Flask handler threads, the scraper pool, RQ
+    jobs) reuses keep-alive connections, at most `limit_per_host` per store and
+    `limit` in total. Callers stay synchronous: fetch() and fetch_many() block on
+    the loop. Connection errors, timeouts and 429/5xx responses are retried with
+    exponential backoff and full jitter. Bodies are parsed as they stream in and
+    the download stops once the parser is done (or after max_bytes).
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8, timeout: float = 2.0,
+                 retries: int = 2, backoff: float = 0.1, chunk_size: int = 16384,
+                 max_bytes: int = 2_000_000, drain_bytes: int = 65536, headers: Optional[dict] = None):
+        if not HAS_AIOHTTP:
+            raise ImportError("AsyncHTTPFetcher requires aiohttp (pip install aiohttp)")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.drain_bytes = drain_bytes
+        self.headers = headers or {"User-Agent": "Mozilla/5.0 (compatible; PriceCompareBot/1.0)"}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked worker inherits the object but not the loop thread; start its own
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="scraper-http", daemon=True).start()
+                self._loop, self._pid, self._session = loop, os.getpid(), None
+            return self._loop
+
+    async def _get_session(self):
+        # Only ever called on the loop thread, so no locking needed
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=30, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def fetch_async(self, url: str, parser_factory: Callable[[], PriceParser] = PriceParser) -> Optional[PriceParser]:
+        """Fetches and parses one page. Returns None for 4xx responses (no such page)."""
+        session = await self._get_session()
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url) as response:
+                    if response.status in RETRY_STATUSES:
+                        error = f"HTTP {response.status}"
+                    elif response.status >= 400:
+                        logger.info(f"{url}: HTTP {response.status}")
+                        return None
+                    else:
+                        return await self._parse(response, parser_factory())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+
+            if attempt < self.retries:
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                logger.warning(f"{url}: {error}; retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        raise ConnectionError(f"{url}: giving up after {self.retries + 1} attempts ({error})")
+
+    async def _parse(self, response, parser: PriceParser) -> PriceParser:
+        decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+        received = 0
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            parser.feed(decoder.decode(chunk))
+            received += len(chunk)
+            if parser.done or received >= self.max_bytes:
+                break
+        # Reading a short remainder keeps the connection reusable; a long one isn't worth it
+        remaining = (response.content_length or 0) - received
+        if not response.content.at_eof() and 0 < remaining <= self.drain_bytes:
+            await response.content.read()
+        return parser
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Runs a coroutine on the fetcher's loop and waits for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def fetch(self, url: str, parser_factory: Callable[[], PriceParser] = PriceParser,
+              timeout: Optional[float] = None) -> Optional[PriceParser]:
+        return self.run(self.fetch_async(url, parser_factory), timeout)
+
+    def fetch_many(self, urls: List[str], parser_factory: Callable[[], PriceParser] = PriceParser,
+                   timeout: Optional[float] = None) -> list:
+        """Fetches all urls concurrently; failed ones come back as the exception instance."""
+        async def gather():
+            return await asyncio.gather(*(self.fetch_async(url, parser_factory) for url in urls),
+                                        return_exceptions=True)
+        return self.run(gather(), timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or self._pid != os.getpid():
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+_fetcher: Optional[AsyncHTTPFetcher] = None
+_fetcher_lock = threading.Lock()
+
+def get_fetcher() -> AsyncHTTPFetcher:
+    """The process-wide fetcher, i.e. one pooled session per worker process."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = AsyncHTTPFetcher()
+        return _fetcher
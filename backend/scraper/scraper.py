@@ -1,89 +1,256 @@
 import time
-import random
 import logging
-from flask import current_app
-from ..api.models import Product
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from flask import current_app, has_app_context
+from .cache import cache, normalize_product
+from .adapters import SiteAdapter, SimulatedStoreAdapter, HTTPStoreAdapter
+from .http_fetcher import HAS_AIOHTTP
+from .single_flight import SingleFlight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PriceScraper")
 
 class PriceScraper:
-    def __init__(self):
-        self.sites = [
+    """
+    Fetches a product's price from every configured site concurrently.
+
+    Sites run on a shared bounded thread pool. Each site gets `site_timeout`
+    seconds from the moment it starts and the whole comparison ends at
+    `deadline`; whatever has arrived by then is returned (`partial` is set and
+    the missing sites are listed in `timed_out`).
+    Each site is fetched by an adapter (see adapters.SiteAdapter). Sites with a
+    "search_url" are fetched live through the pooled async HTTP client; the
+    others use the simulated catalog store unless an adapter is registered.
+    Identical concurrent lookups are coalesced (see single_flight.SingleFlight).
+    """
+
+    def __init__(self, sites: Optional[List[Dict[str, Any]]] = None, max_workers: int = 16,
+                 site_timeout: float = 2.0, deadline: float = 3.0):
+        self.sites = sites or [
             {"name": "Amazon.in", "url": "https://www.amazon.in"},
             {"name": "Flipkart", "url": "https://www.flipkart.com"},
             {"name": "Croma", "url": "https://www.croma.com"}
         ]
+        self.max_workers = max_workers
+        self.site_timeout = site_timeout
+        self.deadline = deadline
+        self.adapters: Dict[str, SiteAdapter] = {}
+        self.default_adapter: SiteAdapter = SimulatedStoreAdapter()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Cross-process coalescing shares the price cache's Redis connection (looked up per call)
+        self.single_flight = SingleFlight(get_client=cache.redis_client)
+
+        for site in self.sites:
+            if site.get("search_url"):
+                if HAS_AIOHTTP:
+                    self.register_adapter(site['name'], HTTPStoreAdapter())
+                else:
+                    logger.warning(f"aiohttp not installed; simulating {site['name']}")
+
+    def register_adapter(self, site_name: str, adapter: SiteAdapter) -> None:
+        """Routes a site's fetches through `adapter` (e.g. a real HTTP client or a local fake)."""
+        self.adapters[site_name] = adapter
 
-    def scrape_all(self, product_name):
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # One pool per scraper, shared by all requests, so concurrent compares stay bounded
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scraper")
+            return self._executor
+
+    def scrape_all(self, product_name, max_workers: Optional[int] = None,
+                   site_timeout: Optional[float] = None, deadline: Optional[float] = None):
         """
-        Simulates scraping by querying the local database of 50k+ items.
-        Returns realistic variations for different stores.
+        Queries every site concurrently and returns the offers sorted by price.
+        max_workers caps the concurrency of this call (a private pool instead of the shared one).
+        Concurrent calls for the same product (ignoring case and spacing) share one fetch,
+        and each site's offer is written through to the price cache.
         """
+        return self.single_flight.do(
+            normalize_product(product_name), lambda: self._scrape_all_sites(product_name, max_workers, site_timeout, deadline))
+
+    def _scrape_all_sites(self, product_name, max_workers, site_timeout, deadline):
         start_time = time.time()
-        results = []
-        
+        site_timeout = self.site_timeout if site_timeout is None else site_timeout
+        deadline = start_time + (self.deadline if deadline is None else deadline)
         logger.info(f"Scraping for: {product_name}")
-        
-        # Search in local DB
+
+        # Worker threads need the app context for the catalog lookups
+        app = current_app._get_current_object() if has_app_context() else None
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers else self.executor
+        calls = [(self._scrape_site, site, product_name) for site in self.sites]
+
+        results, timed_out = [], []
+        try:
+            for i, result, expired in self._iter_completed(executor, app, calls, site_timeout, deadline):
+                if expired:
+                    timed_out.append(self.sites[i]['name'])
+                elif result:
+                    results.append(result)
+        finally:
+            if max_workers:
+                executor.shutdown(wait=False)
+
+        return self._comparison(product_name, results, timed_out, start_time)
+
+    def scrape_many(self, product_names: Iterable[str], site_timeout: Optional[float] = None,
+                    deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Compares many products at once, yielding each product's comparison (as scrape_all
+        returns it) as soon as all of its sites have answered. Every (site, product) key is
+        read from the cache in one batch and only the misses are fetched, in waves of at
+        most max_workers calls: each wave gets the full `deadline`, so a large batch is not
+        cut short, and other requests on the shared pool get a turn between waves. A
+        product's fetched offers are written back to the cache as soon as it completes.
+        """
+        start_time = time.time()
+        site_timeout = self.site_timeout if site_timeout is None else site_timeout
+        deadline = self.deadline if deadline is None else deadline
+        names = list(dict.fromkeys(product_names))
+        app = current_app._get_current_object() if has_app_context() else None
+
+        cached = cache.get_many([(site['name'], name) for name in names for site in self.sites])
+        offers: Dict[str, List[Dict[str, Any]]] = {name: [] for name in names}
+        timed_out: Dict[str, List[str]] = {name: [] for name in names}
+        misses: Dict[str, list] = {name: [] for name in names}
+        for name in names:
+            for site in self.sites:
+                hit = cached.get((site['name'], name))
+                if hit:
+                    offers[name].append(hit)
+                else:
+                    misses[name].append((self.adapters.get(site['name'], self.default_adapter), site, name))
+
+        for name in names:
+            if not misses[name]:
+                yield self._comparison(name, offers[name], [], start_time)
+
+        fetched: Dict[str, list] = {}
+        try:
+            for wave in self._waves([misses[name] for name in names if misses[name]]):
+                calls = [call for product_calls in wave for call in product_calls]
+                remaining = {product_calls[0][2]: len(product_calls) for product_calls in wave}
+                for i, result, expired in self._iter_completed(self.executor, app, calls, site_timeout,
+                                                               time.time() + deadline):
+                    _, site, name = calls[i]
+                    if expired:
+                        timed_out[name].append(site['name'])
+                    elif result:
+                        offers[name].append(result)
+                        fetched.setdefault(name, []).append((site['name'], name, result))
+                    remaining[name] -= 1
+                    if remaining[name] == 0:
+                        if name in fetched:
+                            cache.cache_many(fetched.pop(name))
+                        yield self._comparison(name, offers[name], timed_out[name], start_time)
+        finally:
+            # Stopped early (client went away): keep what the unfinished products already fetched
+            leftover = [offer for product_offers in fetched.values() for offer in product_offers]
+            if leftover:
+                cache.cache_many(leftover)
+
+    def _waves(self, product_calls: List[list]) -> Iterator[List[list]]:
+        """Groups whole products so each group has at most max_workers calls (one product at least)."""
+        wave, size = [], 0
+        for calls in product_calls:
+            if wave and size + len(calls) > self.max_workers:
+                yield wave
+                wave, size = [], 0
+            wave.append(calls)
+            size += len(calls)
+        if wave:
+            yield wave
+
+    def _iter_completed(self, executor, app, calls: List[Tuple[Any, Dict[str, Any], str]],
+                        site_timeout: float, deadline: float) -> Iterator[Tuple[int, Optional[Dict[str, Any]], bool]]:
+        """
+        Runs each (fn, site, product_name) call on the executor and yields (index, result, expired)
+        as calls finish. A call expires `site_timeout` seconds after a worker picks it up or at
+        `deadline`; failures are logged and yield a None result.
+        """
+        started: Dict[int, float] = {}  # call index -> time a worker picked it up
+        futures = {
+            executor.submit(self._run_site, app, fn, site, product_name, started, i, site_timeout, deadline): i
+            for i, (fn, site, product_name) in enumerate(calls)
+        }
+
+        pending = set(futures)
         try:
-            # Ensure we are in app context
-            if not current_app:
-                logger.error("No app context for database query")
-                return {"product": product_name, "results": [], "total_latency_ms": 0}
-
-            search_term = f"%{product_name}%"
-            # Find best match (limit to 1 for "Best Deal" logic, or more if we want variety)
-            # We'll get a few matches to simulate different products found
-            db_products = Product.query.filter(Product.name.ilike(search_term)).limit(3).all()
-            
-            if not db_products:
-                # Fallback: Try to find something in the same category if specific name fails
-                # This makes the demo robust
-                logger.info("No direct match, trying broad search")
-                parts = product_name.split()
-                if parts:
-                    search_term = f"%{parts[0]}%"
-                    db_products = Product.query.filter(Product.name.ilike(search_term)).limit(3).all()
-
-            if db_products:
-                base_product = db_products[0] # Use the best match as the "canonical" product
-                
-                for site in self.sites:
-                    # Simulate network latency
-                    time.sleep(random.uniform(0.1, 0.5))
-                    
-                    # Simulate price variation (Amazon usually cheaper, etc.)
-                    price_variation = random.uniform(0.9, 1.1)
-                    if site['name'] == "Amazon.in":
-                        price_variation = random.uniform(0.85, 1.0)
-                    elif site['name'] == "Flipkart":
-                        price_variation = random.uniform(0.9, 1.05)
-                    
-                    simulated_price = round(base_product.price * price_variation, 2)
-                    
-                    results.append({
-                        "site": site['name'],
-                        "price": simulated_price,
-                        "image_url": base_product.image_url,
-                        "rating": base_product.rating,
-                        "reviews": base_product.reviews,
-                        "product_url": base_product.product_url,
-                        "currency": "₹",
-                        "name": base_product.name, # The name might slightly differ on sites in reality
-                        "source": "simulation"
-                    })
-            
-        except Exception as e:
-            logger.error(f"Database search failed: {str(e)}")
+            while pending:
+                now = time.time()
+                if now >= deadline:
+                    expired = set(pending)
+                else:
+                    expired = {f for f in pending if futures[f] in started and now - started[futures[f]] >= site_timeout}
+                for future in expired:
+                    yield futures[future], None, True
+                pending -= expired
+                if not pending:
+                    break
+                limits = [started[futures[f]] + site_timeout for f in pending if futures[f] in started]
+                timeout = min(limits + [deadline]) - now
+                done, pending = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Scraping {calls[i][1]['name']} failed: {str(e)}")
+                        result = None
+                    yield i, result, False
+        finally:
+            # Calls still queued are dropped; running ones finish in the background
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _comparison(product_name, results, timed_out, start_time) -> Dict[str, Any]:
+        if timed_out:
+            logger.warning(f"Timed out waiting for {timed_out}; returning partial results")
 
         # Sort by price
         results.sort(key=lambda x: x['price'])
-        
+
         total_latency = (time.time() - start_time) * 1000
         return {
             "product": product_name,
             "results": results,
+            "timed_out": timed_out,
+            "partial": bool(timed_out),
             "total_latency_ms": round(total_latency, 2)
         }
+
+    def _run_site(self, app, fn, site, product_name, started, index, site_timeout, deadline):
+        started[index] = now = time.time()
+        # Adapters get the seconds left in this site's budget, so their I/O gives up with it
+        site = dict(site, timeout=max(min(now + site_timeout, deadline) - now, 0.0))
+        return self._call_in_app(app, fn, site, product_name)
+
+    @staticmethod
+    def _call_in_app(app, fn, *args):
+        if app is None:
+            return fn(*args)
+        with app.app_context():
+            return fn(*args)
+
+    def _scrape_site(self, site: Dict[str, Any], product_name: str) -> Optional[Dict[str, Any]]:
+        """
+        One site's offer: served from the cache when possible, else fetched by the site's adapter.
+        A stale cached offer is served while the cache refreshes it in the background.
+        """
+        adapter = self.adapters.get(site['name'], self.default_adapter)
+        app = current_app._get_current_object() if has_app_context() else None
+        cached = cache.get_cached_price(site['name'], product_name,
+                                        revalidate=lambda: self._call_in_app(app, adapter, site, product_name))
+        if cached:
+            return cached
+
+        result = adapter(site, product_name)
+        if result:
+            cache.cache_price(site['name'], product_name, result)
+        return result
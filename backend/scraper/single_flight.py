@@ -0,0 +1,126 @@
+import copy
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("PriceScraper")
+
+# Deletes the lock only if we still own it (it may have expired and been re-taken)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.waiters = 0
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    Within a process the first caller (the leader) runs the function and every
+    caller arriving while it is in flight waits for and shares its result or
+    exception. With a Redis client the leader also takes `singleflight:<key>`
+    (SET NX PX), so leaders in other worker processes wait for it to be released
+    before running; their function then finds the leader's write-through cache
+    entries instead of hitting the stores again. A waiter that gives up after
+    `wait_timeout` runs the function itself, so a crashed leader cannot wedge a key.
+    Waiters get their own deep copy of the result. Pass `get_client` instead of a
+    fixed `redis_client` to look the client up (e.g. after a reconnect) on every call.
+    """
+
+    def __init__(self, redis_client=None, lock_ttl: float = 10.0, wait_timeout: float = 5.0,
+                 poll_interval: float = 0.05, get_client: Optional[Callable[[], Any]] = None):
+        self.redis = redis_client
+        self.get_client = get_client
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._release = None
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            self._count()
+            if call.done.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return copy.deepcopy(call.result)
+            logger.warning(f"Single-flight wait for {key!r} timed out; fetching directly")
+            return fn()
+
+        try:
+            result = self._run_exclusive(key, fn)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # Snapshot before the leader's caller can mutate it; no waiter can join any more
+            if call.waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def _client(self):
+        return self.get_client() if self.get_client is not None else self.redis
+
+    def _run_exclusive(self, key: str, fn: Callable[[], Any]) -> Any:
+        client = self._client()
+        if client is None:
+            return fn()
+
+        lock_key = f"singleflight:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            if not acquired:
+                # Another process is fetching: wait for it, then run (normally served from cache)
+                self._count(client)
+                deadline = time.time() + self.wait_timeout
+                while client.exists(lock_key) and time.time() < deadline:
+                    time.sleep(self.poll_interval)
+        except Exception as e:
+            print(f"Single-flight lock error: {e}")
+            acquired = False
+        if not acquired:
+            return fn()
+
+        try:
+            return fn()
+        finally:
+            try:
+                # Scripts are bound to the client they were registered on
+                if self._release is None or self._release[0] is not client:
+                    self._release = (client, client.register_script(_RELEASE_SCRIPT))
+                self._release[1](keys=[lock_key], args=[token])
+            except Exception as e:
+                print(f"Single-flight unlock error: {e}")
+
+    def _count(self, client=None) -> None:
+        self.coalesced += 1
+        client = client if client is not None else self._client()
+        if client is not None:
+            try:
+                client.incr('metrics:scrape_coalesced')
+            except Exception:
+                pass
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: per-row ALS solve loop vs. the bucketed batched Gram kernel.
+
+Usage:
+    python benchmarks/bench_als_solvers.py --users 20000 --items 2000 --density 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.recommender.parallel_engine import _solve_rows, _solve_rows_batched
+
+
+def best_of(fn, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.01)
+    parser.add_argument('--factors', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    ratings = sparse_random(args.users, args.items, density=args.density, format='csr', random_state=0)
+    ratings.data = np.round(ratings.data * 4 + 1)
+    fixed = np.random.default_rng(0).normal(scale=1. / args.factors, size=(args.items, args.factors))
+    rows = np.arange(args.users)
+    solve_args = (rows, fixed, ratings.indptr, ratings.indices, ratings.data, 0.1)
+
+    loop_time, loop_result = best_of(lambda: _solve_rows(*solve_args), args.repeats)
+    batched_time, batched_result = best_of(lambda: _solve_rows_batched(*solve_args), args.repeats)
+
+    print(f"Ratings: {args.users} x {args.items}, nnz={ratings.nnz}, factors={args.factors}")
+    print(f"Per-row loop:   {loop_time * 1000:8.1f} ms")
+    print(f"Batched kernel: {batched_time * 1000:8.1f} ms  ({loop_time / batched_time:.1f}x)")
+    print(f"Max abs difference: {np.abs(loop_result - batched_result).max():.2e}")
+
+
+if __name__ == '__main__':
+    main()
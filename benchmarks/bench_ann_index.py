@@ -0,0 +1,66 @@
+"""
+Benchmark: IVF inner-product index vs. exact scoring of the full catalog (recall@10 and latency).
+
+Usage:
+    python benchmarks/bench_ann_index.py --items 50000 --factors 20 --probes 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.recommender.ann_index import IVFIndex
+
+
+def synthetic_factors(n, n_factors, n_topics, rng):
+    # ALS item factors cluster by category/taste; a topic mixture mimics that
+    topics = rng.normal(size=(n_topics, n_factors))
+    scale = rng.lognormal(sigma=0.3, size=(n, 1))
+    return scale * (topics[rng.integers(0, n_topics, n)] + 0.5 * rng.normal(size=(n, n_factors)))
+
+
+def timed_search(search, queries, k):
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(search(q, k)[0])
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--factors', type=int, default=20)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--lists', type=int, default=None)
+    parser.add_argument('--probes', type=int, nargs='+', default=[4, 8, 16, 32, 64])
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    V = synthetic_factors(args.items, args.factors, args.topics, rng)
+    queries = synthetic_factors(args.queries, args.factors, args.topics, rng)
+
+    start = time.perf_counter()
+    index = IVFIndex(n_lists=args.lists).build(V)
+    print(f"Items: {args.items}, factors={args.factors}, lists={index.n_lists}, "
+          f"build={time.perf_counter() - start:.2f}s")
+
+    exact_time, exact = timed_search(index.search_exact, queries, args.k)
+    print(f"{'method':<14}{'recall@' + str(args.k):>10}{'latency':>12}{'speedup':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{exact_time * 1000:>10.3f}ms{1.0:>9.1f}x")
+
+    for n_probe in args.probes:
+        ivf_time, approx = timed_search(lambda q, k: index.search(q, k, n_probe=n_probe), queries, args.k)
+        recall = np.mean([len(np.intersect1d(a, e)) / args.k for a, e in zip(approx, exact)])
+        label = f"ivf probe={n_probe}"
+        print(f"{label:<14}{recall:>10.3f}{ivf_time * 1000:>10.3f}ms{exact_time / ivf_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
+import json
 import pytest
 import numpy as np
-from backend.recommender.als_ncg import ALSRecommender
+from scipy.sparse import csr_matrix
+from backend.recommender.als_ncg import ALSRecommender, MANIFEST_FILE, als_objective, implicit_objective, _line_search
 
 def test_als_initialization():
     model = ALSRecommender(n_factors=5, max_iter=2)
@@ -11,19 +13,50 @@ def test_als_fit_predict():
     data = [
         (0, 0, 5.0), (0, 1, 3.0),
         (1, 0, 4.0), (1, 1, 1.0),
-        (2, 1, 2.0), (2, 2, 5.0)
+        (2, 1, 2.0), (2, 2, 5.0), (2, 3, 4.0)
     ]
     
     model = ALSRecommender(n_factors=2, max_iter=2)
     model.fit(data)
     
     assert model.U.shape == (3, 2)
-    assert model.V.shape == (3, 2)
+    assert model.V.shape == (4, 2)
     
     recs = model.predict(0, n_top=2)
     assert len(recs) == 2
     assert isinstance(recs[0], tuple)
+    # Already rated items are never recommended
+    assert {item for item, _ in recs} == {2, 3}
+    assert recs[0][1] >= recs[1][1]
+
+def test_predict_batch_matches_predict():
+    rng = np.random.default_rng(0)
+    data = [(u, i, float(rng.integers(1, 6))) for u in range(6) for i in range(8) if (u + i) % 3 == 0]
+    
+    model = ALSRecommender(n_factors=3, max_iter=3)
+    model.fit(data)
     
+    batch = model.predict_batch([0, 3, 5], n_top=4)
+    assert len(batch) == 3
+    for user_id, recs in zip([0, 3, 5], batch):
+        expected = model.predict(user_id, n_top=4)
+        assert [item for item, _ in recs] == [item for item, _ in expected]
+        rated = set(model.train_matrix[user_id].indices)
+        assert not rated & {item for item, _ in recs}
+    
+def test_predict_batch_invalid_ids_are_cold():
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (2, 2, 1.0), (2, 0, 2.0)]
+    model = ALSRecommender(n_factors=2, max_iter=2)
+    model.fit(data)
+    n_users = model.U.shape[0]
+    
+    batch = model.predict_batch([-1, 0, n_users], n_top=2)
+    assert batch[0] == batch[2] == model.popularity.top(2)  # not the last user's list
+    assert batch[1] == model.predict(0, n_top=2)
+    
+    model.popularity = None
+    assert model.predict_batch([-1, n_users], n_top=2) == [[], []]
+
 def test_predict_invalid_user():
     model = ALSRecommender()
     # Mock trained state
@@ -35,3 +68,279 @@ def test_predict_invalid_user():
     # If we pass index out of bounds for numpy array, it raises IndexError
     with pytest.raises(IndexError):
         model.predict(10)
+
+def test_process_backend_matches_thread_backend():
+    data = [(u, i, float((u * 7 + i) % 5 + 1)) for u in range(12) for i in range(9) if (u + 2 * i) % 4 != 0]
+    
+    np.random.seed(1)
+    threaded = ALSRecommender(n_factors=3, max_iter=3, n_jobs=2)
+    threaded.fit(data)
+    
+    np.random.seed(1)
+    pooled = ALSRecommender(n_factors=3, max_iter=3, n_jobs=2, backend="process")
+    pooled.fit(data)
+    
+    np.testing.assert_allclose(pooled.U, threaded.U, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(pooled.V, threaded.V, rtol=1e-8, atol=1e-10)
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        ALSRecommender(backend="mpi")
+    with pytest.raises(ValueError):
+        ALSRecommender(backend="process", engine="numba")  # would silently ignore the pool
+
+def test_als_ncg_converges_faster_than_als():
+    rng = np.random.default_rng(0)
+    U_true = rng.normal(size=(300, 5))
+    V_true = rng.normal(size=(150, 5))
+    rows, cols = np.nonzero(rng.random((300, 150)) < 0.08)
+    ratings = np.einsum('ij,ij->i', U_true[rows], V_true[cols])
+    data = list(zip(rows.tolist(), cols.tolist(), ratings.tolist()))
+    
+    losses = {}
+    for optimizer in ("als", "als_ncg"):
+        np.random.seed(0)
+        model = ALSRecommender(n_factors=5, max_iter=15, optimizer=optimizer)
+        model.fit(data)
+        losses[optimizer] = als_objective(model.U, model.V, rows, cols, ratings, model.regularization)
+    
+    assert losses["als_ncg"] < losses["als"]
+
+def test_line_search_never_worse_than_als_step():
+    rng = np.random.default_rng(1)
+    U, V = rng.normal(size=(20, 3)), rng.normal(size=(15, 3))
+    dU, dV = rng.normal(size=(20, 3)), rng.normal(size=(15, 3))
+    rows, cols = np.nonzero(rng.random((20, 15)) < 0.3)
+    data = rng.normal(size=len(rows))
+    
+    alpha, loss = _line_search(U, V, dU, dV, rows, cols, data, 0.1)
+    
+    assert loss <= als_objective(U, V, rows, cols, data, 0.1) + 1e-9
+    assert loss <= als_objective(U + dU, V + dV, rows, cols, data, 0.1) + 1e-9
+    assert np.isclose(loss, als_objective(U + alpha * dU, V + alpha * dV, rows, cols, data, 0.1))
+
+def test_implicit_fit_ranks_co_consumed_items():
+    # Two user groups with disjoint tastes; user 0 has not yet seen item 2
+    data = [(u, i, 1.0) for u in range(1, 6) for i in (0, 1, 2)]
+    data += [(u, i, 1.0) for u in range(6, 11) for i in (3, 4, 5)]
+    data += [(0, 0, 2.0), (0, 1, 1.0)]
+    
+    np.random.seed(0)
+    model = ALSRecommender(n_factors=2, max_iter=10, implicit=True, alpha=10.0)
+    model.fit(data)
+    
+    assert model.predict(0, n_top=1)[0][0] == 2
+
+def test_implicit_process_backend_matches_threads():
+    data = [(u, i, float(u % 3 + 1)) for u in range(10) for i in range(8) if (u * i) % 3 == 1]
+    
+    np.random.seed(4)
+    threaded = ALSRecommender(n_factors=3, max_iter=2, implicit=True, alpha=5.0)
+    threaded.fit(data)
+    np.random.seed(4)
+    pooled = ALSRecommender(n_factors=3, max_iter=2, implicit=True, alpha=5.0, n_jobs=2, backend="process")
+    pooled.fit(data)
+    
+    np.testing.assert_allclose(pooled.U, threaded.U, rtol=1e-8, atol=1e-10)
+
+def test_fit_history_and_early_stopping():
+    from backend.recommender.preprocess import Preprocessor
+    rng = np.random.default_rng(5)
+    U_true, V_true = rng.normal(size=(60, 3)), rng.normal(size=(40, 3))
+    rows, cols = np.nonzero(rng.random((60, 40)) < 0.3)
+    ratings = np.einsum('ij,ij->i', U_true[rows], V_true[cols])
+    train, test = Preprocessor.split_data(list(zip(rows.tolist(), cols.tolist(), ratings.tolist())))
+    
+    np.random.seed(0)
+    model = ALSRecommender(n_factors=3, max_iter=50, tol=0.02)
+    model.fit(train, validation_data=test)
+    
+    assert 1 < len(model.history_) < 50
+    assert all({"iteration", "loss", "val_rmse", "time"} <= set(h) for h in model.history_)
+    losses = [h["loss"] for h in model.history_]
+    assert losses[-1] < losses[0]
+    assert model.history_[-1]["val_rmse"] == pytest.approx(model.rmse(test))
+
+def test_history_empty_without_monitoring():
+    model = ALSRecommender(n_factors=2, max_iter=2)
+    model.fit([(0, 0, 5.0), (1, 1, 3.0)])
+    assert [set(h) for h in model.history_] == [{"iteration", "time"}] * 2
+
+def test_implicit_objective_matches_dense():
+    rng = np.random.default_rng(6)
+    U, V = rng.normal(size=(8, 2)), rng.normal(size=(6, 2))
+    weights = np.where(rng.random((8, 6)) < 0.4, rng.integers(1, 4, size=(8, 6)), 0).astype(float)
+    rows, cols = np.nonzero(weights)
+    
+    scores = U @ V.T
+    expected = 0.5 * np.sum((1 + 3.0 * weights) * ((weights > 0) - scores) ** 2)
+    expected += 0.5 * 0.1 * (np.sum(U ** 2) + np.sum(V ** 2))
+    
+    assert implicit_objective(U, V, rows, cols, weights[rows, cols], 0.1, 3.0) == pytest.approx(expected)
+
+def _trained_model():
+    rng = np.random.default_rng(7)
+    data = [(u, i, float(rng.integers(1, 6))) for u in range(20) for i in range(12) if rng.random() < 0.4]
+    np.random.seed(0)
+    model = ALSRecommender(n_factors=3, max_iter=5)
+    model.fit(data)
+    return model
+
+def test_fold_in_users_matches_exact_solve():
+    model = _trained_model()
+    V_before = model.V.copy()
+    rows = csr_matrix(np.array([[5.0, 0, 3.0] + [0] * 9, [0, 4.0, 0] + [1.0] * 9]))
+    
+    ids = model.fold_in_users(rows)
+    
+    assert list(ids) == [20, 21]
+    assert model.U.shape == (22, 3)
+    assert model.train_matrix.shape == (22, 12)
+    np.testing.assert_array_equal(model.V, V_before)
+    Vr = model.V[[0, 2]]
+    expected = np.linalg.solve(Vr.T @ Vr + model.regularization * np.eye(3), Vr.T @ np.array([5.0, 3.0]))
+    np.testing.assert_allclose(model.U[20], expected)
+    assert {item for item, _ in model.predict(20, n_top=20)}.isdisjoint({0, 2})
+
+def test_partial_fit_solves_new_items_before_users():
+    model = _trained_model()
+    u0, reg = model.U[0].copy(), model.regularization
+    model.partial_fit([(0, 12, 5.0)])
+    
+    # Item 12 (new) first gets factors from its only rating, against the old U[0] ...
+    v_new = np.linalg.solve(np.outer(u0, u0) + reg * np.eye(3), 5.0 * u0)
+    # ... and the user solve already uses them instead of a zero row
+    row = model.train_matrix[0]
+    Vr = model.V[row.indices].copy()
+    Vr[row.indices == 12] = v_new
+    expected = np.linalg.solve(Vr.T @ Vr + reg * np.eye(3), Vr.T @ row.data)
+    np.testing.assert_allclose(model.U[0], expected)
+
+def test_fold_in_items_replaces_existing_row():
+    model = _trained_model()
+    users_col = csr_matrix(np.array([[4.0] + [0] * 19]))
+    
+    model.fold_in_items(users_col, item_ids=[3])
+    
+    assert model.V.shape == (12, 3)
+    assert list(model.train_matrix[:, 3].nonzero()[0]) == [0]
+
+def test_partial_fit_grows_and_resizes_amortized():
+    model = _trained_model()
+    untouched = model.U[5].copy()
+    
+    for step in range(10):
+        model.partial_fit([(20 + step, 1, 4.0), (20 + step, 12, 5.0)])
+    
+    assert model.U.shape == (30, 3) and model.V.shape == (13, 3)
+    assert model.train_matrix[29, 12] == 5.0
+    np.testing.assert_array_equal(model.U[5], untouched)
+    # Growth over-allocates, so appending one user at a time reuses the same buffer
+    assert np.shares_memory(model.U, model._buffers["U"])
+    assert model._buffers["U"].shape[0] >= 30
+
+def test_warm_start_reuses_factors_by_id():
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (2, 2, 1.0), (2, 0, 2.0)]
+    np.random.seed(0)
+    model = ALSRecommender(n_factors=2, max_iter=3, warm_start=True)
+    model.fit(data, user_ids=[100, 200, 300], item_ids=["a", "b", "c"])
+    U_old, V_old = model.U.copy(), model.V.copy()
+    
+    # Next night: user 200 left, user 400 arrived, items were re-indexed
+    model.max_iter = 0
+    shuffled = [(0, 2, 4.0), (1, 0, 3.0), (2, 1, 5.0)]
+    model.fit(shuffled, user_ids=[300, 100, 400], item_ids=["c", "a", "b"])
+    
+    np.testing.assert_array_equal(model.U[0], U_old[2])
+    np.testing.assert_array_equal(model.U[1], U_old[0])
+    assert not np.any(np.all(model.U[2] == U_old, axis=1))
+    np.testing.assert_array_equal(model.V, V_old[[2, 0, 1]])
+    assert list(model.user_ids) == [300, 100, 400]
+
+def test_warm_start_converges_in_fewer_sweeps():
+    rng = np.random.default_rng(8)
+    U_true, V_true = rng.normal(size=(80, 3)), rng.normal(size=(50, 3))
+    rows, cols = np.nonzero(rng.random((80, 50)) < 0.25)
+    data = list(zip(rows.tolist(), cols.tolist(), np.einsum('ij,ij->i', U_true[rows], V_true[cols]).tolist()))
+    
+    np.random.seed(0)
+    warm = ALSRecommender(n_factors=3, max_iter=15, warm_start=True)
+    warm.fit(data)
+    warm.max_iter = 2
+    warm.fit(data + [(80, 0, 1.0)])
+    
+    np.random.seed(0)
+    cold = ALSRecommender(n_factors=3, max_iter=2)
+    cold.fit(data + [(80, 0, 1.0)])
+    
+    assert warm.rmse(data) < cold.rmse(data)
+
+def test_fit_rejects_mismatched_ids():
+    with pytest.raises(ValueError):
+        ALSRecommender(n_factors=2).fit([(0, 0, 1.0), (1, 1, 1.0)], user_ids=[1])
+
+def test_save_load_round_trip_mmap(tmp_path):
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (2, 2, 1.0), (2, 0, 2.0)]
+    model = ALSRecommender(n_factors=2, max_iter=3)
+    model.fit(data, user_ids=[100, 200, 300], item_ids=["a", "b", "c"])
+    version = model.save(str(tmp_path))
+    
+    loaded = ALSRecommender.load(str(tmp_path), verify=True, n_jobs=2)
+    assert isinstance(loaded.U, np.memmap)
+    assert loaded.model_version == version
+    assert loaded.n_factors == 2 and loaded.n_jobs == 2
+    np.testing.assert_array_equal(loaded.U, model.U)
+    assert (loaded.train_matrix != model.train_matrix).nnz == 0
+    assert list(loaded.item_ids) == ["a", "b", "c"]
+    assert loaded.predict(0, n_top=2) == model.predict(0, n_top=2)
+    
+    # Copy-on-write: incremental updates never touch the file on disk
+    loaded.partial_fit([(0, 2, 4.0)])
+    np.testing.assert_array_equal(ALSRecommender.load(str(tmp_path)).U, model.U)
+
+def test_load_rejects_corrupt_artifact(tmp_path):
+    model = ALSRecommender(n_factors=2, max_iter=1)
+    model.fit([(0, 0, 5.0), (1, 1, 4.0)])
+    model.save(str(tmp_path))
+    
+    U_file = tmp_path / json.loads((tmp_path / MANIFEST_FILE).read_text())["arrays"]["U"]["file"]
+    np.save(U_file, np.load(U_file) + 1)
+    with pytest.raises(ValueError):
+        ALSRecommender.load(str(tmp_path), verify=True)
+
+def test_resave_while_old_artifact_is_mmapped(tmp_path):
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (2, 2, 1.0), (2, 0, 2.0)]
+    model = ALSRecommender(n_factors=2, max_iter=3, random_state=0)
+    model.fit(data)
+    model.save(str(tmp_path))
+    serving = ALSRecommender.load(str(tmp_path))  # a worker still on the old version
+    old_U, old_recs = np.array(serving.U), serving.predict(0, n_top=2)
+    
+    for seed in (1, 2):
+        model = ALSRecommender(n_factors=2, max_iter=3, random_state=seed)
+        model.fit(data)
+        model.save(str(tmp_path))
+    
+    # The old mapping was neither truncated (SIGBUS) nor overwritten
+    np.testing.assert_array_equal(serving.U, old_U)
+    assert serving.predict(0, n_top=2) == old_recs
+    np.testing.assert_array_equal(ALSRecommender.load(str(tmp_path), verify=True).U, model.U)
+    # Only the current and the previous version are kept on disk
+    assert len(list(tmp_path.glob("U.*.npy"))) == 2
+
+def test_model_version_shared_and_bumped_on_updates():
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (2, 2, 1.0), (2, 0, 2.0)]
+    first, second = (ALSRecommender(n_factors=2, max_iter=3, random_state=7) for _ in range(2))
+    first.fit(data)
+    second.fit(data)
+    assert first.model_version == second.model_version  # e.g. two workers training at start-up
+    
+    version = first.model_version
+    first.partial_fit([(1, 2, 5.0)])
+    assert first.model_version != version
+    second.partial_fit([(1, 2, 5.0)])
+    assert second.model_version == first.model_version
+    
+    version = first.model_version
+    first.fold_in_users(csr_matrix(np.array([[0.0, 4.0, 0.0]])))
+    assert first.model_version != version
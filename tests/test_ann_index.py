@@ -0,0 +1,56 @@
+import numpy as np
+from backend.recommender.ann_index import IVFIndex
+from backend.recommender.als_ncg import ALSRecommender
+
+def _clustered_factors(n_items=3000, n_factors=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(30, n_factors))
+    return centers[rng.integers(0, 30, n_items)] + 0.3 * rng.normal(size=(n_items, n_factors))
+
+def test_ivf_recall_improves_with_probes():
+    V = _clustered_factors()
+    index = IVFIndex(n_lists=64).build(V)
+    queries = np.random.default_rng(1).normal(size=(50, V.shape[1]))
+    
+    def recall(n_probe):
+        hits = 0
+        for q in queries:
+            exact = np.argsort(-(V @ q))[:10]
+            approx, _ = index.search(q, 10, n_probe=n_probe)
+            hits += len(np.intersect1d(exact, approx))
+        return hits / (10 * len(queries))
+    
+    assert recall(64) == 1.0
+    assert recall(16) >= 0.9
+    assert recall(16) >= recall(2)
+
+def test_ivf_search_respects_exclusions_and_fallback():
+    V = _clustered_factors(n_items=200)
+    index = IVFIndex(n_lists=20, n_probe=1).build(V)
+    q = V[0]
+    exclude = np.argsort(-(V @ q))[:5]
+    
+    items, scores = index.search(q, 10, exclude=exclude)
+    assert not np.isin(items, exclude).any()
+    assert np.all(np.diff(scores) <= 0)
+    
+    # Asking for more items than one list holds falls back to exact search
+    items, _ = index.search(q, 150)
+    np.testing.assert_array_equal(items, index.search_exact(q, 150)[0])
+
+def test_recommender_ann_predict_matches_exact():
+    data = [(u, i, float((u * i) % 5 + 1)) for u in range(40) for i in range(60) if (u + i) % 3 == 0]
+    np.random.seed(0)
+    model = ALSRecommender(n_factors=4, max_iter=3, use_ann=True, ann_probe=1000)
+    model.fit(data)
+    assert model.index is not None
+    
+    ann = model.predict(1, n_top=5)
+    model.use_ann = False
+    exact = model.predict(1, n_top=5)
+    np.testing.assert_allclose([s for _, s in ann], [s for _, s in exact])
+    
+    model.use_ann = True
+    model.partial_fit([(1, 61, 5.0)])
+    assert model.index is None
+    assert len(model.predict(1, n_top=5)) == 5 and model.index.n_items == 62
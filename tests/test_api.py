@@ -14,8 +14,12 @@ def test_health_check(client):
     assert rv.json['status'] == 'ok'
 
 def test_recommendations_missing_param(client):
-    rv = client.get('/recommendations')
-    assert rv.status_code == 400
+    # Anonymous traffic is served from the precomputed popularity tier
+    rv = client.get('/recommendations?n=3')
+    assert rv.status_code == 200
+    recs = rv.json['data']['recommendations']
+    recommender = client.application.config['RECOMMENDER']
+    assert [r['item_id'] for r in recs] == [i for i, _ in recommender.popularity.top(3)]
 
 def test_recommendations_valid(client):
     # Assuming dummy data in create_app has user 0
@@ -24,9 +28,89 @@ def test_recommendations_valid(client):
     assert rv.json['status'] == 'success'
     assert len(rv.json['data']['recommendations']) > 0
 
+def test_user_id_lookups_are_bounded(client, monkeypatch):
+    import uuid
+    from collections import OrderedDict
+    from backend.api.models import db, User
+    from backend.api.routes import recommendations
+    monkeypatch.setattr(recommendations, 'MAX_CACHED_USER_IDS', 2)
+    monkeypatch.setattr(recommendations, '_user_ids', OrderedDict())
+    
+    names = [f"lru-{uuid.uuid4().hex}" for _ in range(3)]
+    with client.application.app_context():
+        users = [User(username=name, password_hash="x") for name in names]
+        db.session.add_all(users)
+        db.session.commit()
+        ids = [recommendations._user_id_for(name) for name in names]
+        assert ids == [user.id for user in users]
+    assert list(recommendations._user_ids) == names[1:]  # the oldest lookup was evicted
+
 def test_compare_price_valid(client):
     # Mocking scraper would be better, but for integration test we can let it run (it mocks network anyway)
     rv = client.get('/compare_price?product=test')
     assert rv.status_code == 200
     assert rv.json['status'] == 'success'
     assert 'results' in rv.json['data']
+
+def test_compare_price_batch(client):
+    rv = client.post('/compare_price/batch', json={"products": ["test", "phone", "test"]})
+    assert rv.status_code == 200
+    results = rv.json['data']['results']
+    assert [r['product'] for r in results] == ["test", "phone"]
+    assert all('results' in r and 'partial' in r for r in results)
+
+def test_compare_price_batch_stream(client):
+    import json
+    rv = client.post('/compare_price/batch', json={"products": ["test", "phone"], "stream": True})
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in rv.data.decode().splitlines()]
+    assert sorted(line['product'] for line in lines) == ["phone", "test"]
+
+def test_compare_price_batch_invalid(client):
+    assert client.post('/compare_price/batch', json={"products": "test"}).status_code == 400
+    rv = client.post('/compare_price/batch', json={"products": ["p"] * 101})
+    assert rv.status_code == 413
+
+def test_similar_items(client):
+    rv = client.get('/similar/0?n=3')
+    assert rv.status_code == 200
+    similar = rv.json['data']['similar']
+    assert 0 < len(similar) <= 3
+    assert all(rec['item_id'] != 0 for rec in similar)
+
+def test_similar_unknown_item(client):
+    rv = client.get('/similar/9999')
+    assert rv.status_code == 404
+
+def test_recommendations_served_from_cache(client):
+    first = client.get('/recommendations?user_id=0&n=3').json['data']['recommendations']
+    rec_cache = client.application.config['REC_CACHE']
+    hits = rec_cache.hits
+    
+    second = client.get('/recommendations?user_id=0&n=3').json['data']['recommendations']
+    assert second == first
+    assert rec_cache.hits == hits + 1
+
+def test_recommendations_batch(client):
+    rv = client.post('/recommendations/batch', json={"user_ids": [0, 2, 99], "n": 2})
+    assert rv.status_code == 200
+    results = rv.json['data']['results']
+    assert [r['user_id'] for r in results] == [0, 2, 99]
+    assert 0 < len(results[0]['recommendations']) <= 2
+    assert results[2]['recommendations'] == client.get('/recommendations?n=2').json['data']['recommendations']
+    
+    single = client.get('/recommendations?user_id=2&n=2').json['data']['recommendations']
+    assert results[1]['recommendations'] == single
+
+def test_recommendations_batch_stream(client):
+    import json
+    rv = client.post('/recommendations/batch', json={"user_ids": [1, 0], "n": 2, "stream": True})
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in rv.data.decode().splitlines()]
+    assert [line['user_id'] for line in lines] == [1, 0]
+
+def test_recommendations_batch_invalid(client):
+    rv = client.post('/recommendations/batch', json={"user_ids": "0,1"})
+    assert rv.status_code == 400
@@ -0,0 +1,135 @@
+import time
+import threading
+import redis
+from backend.scraper.cache import ScraperCache, normalize_product
+
+OFFER = {"site": "Amazon.in", "price": 999.0}
+
+class FakeRedis:
+    """Just enough of redis.Redis for ScraperCache, counting round trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.data[key] = value
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def incrby(self, key, n):
+        self.ops.append(lambda data: data.__setitem__(key, data.get(key, 0) + n))
+
+    def setex(self, key, ttl, value):
+        self.ops.append(lambda data: data.__setitem__(key, value))
+
+    def execute(self):
+        self.client.round_trips += 1
+        for op in self.ops:
+            op(self.client.data)
+
+class DownRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("connection refused")
+        return fail
+
+def test_local_tier_saves_round_trips():
+    client = FakeRedis()
+    cache = ScraperCache(client=client, metrics_interval=60)
+    cache.cache_price("Amazon.in", "Pixel 8", OFFER)
+    assert client.round_trips == 1
+
+    for _ in range(5):
+        assert cache.get_cached_price("Amazon.in", "pixel 8")['price'] == 999.0
+    assert client.round_trips == 1
+
+    # Another worker sees the entry through Redis
+    other = ScraperCache(client=client, metrics_interval=60)
+    assert other.get_cached_price("Amazon.in", "Pixel 8")['source'] == 'cache'
+    assert client.round_trips == 2
+
+def test_stale_while_revalidate():
+    cache = ScraperCache(client=FakeRedis(), expiry=0.1, stale_ttl=10)
+    cache.cache_price("Amazon.in", "Pixel 8", OFFER)
+    time.sleep(0.15)
+
+    assert cache.get_cached_price("Amazon.in", "Pixel 8") is None  # no way to refresh: a miss
+
+    refreshed = threading.Event()
+    calls = []
+
+    def revalidate():
+        calls.append(1)
+        time.sleep(0.05)
+        refreshed.set()
+        return dict(OFFER, price=899.0)
+
+    for _ in range(3):
+        stale = cache.get_cached_price("Amazon.in", "Pixel 8", revalidate=revalidate)
+        assert stale['price'] == 999.0 and stale['stale'] is True
+    assert refreshed.wait(1.0)
+    time.sleep(0.05)
+
+    assert len(calls) == 1
+    fresh = cache.get_cached_price("Amazon.in", "Pixel 8", revalidate=revalidate)
+    assert fresh['price'] == 899.0 and 'stale' not in fresh
+
+def test_redis_outage_falls_back_to_local_tier():
+    cache = ScraperCache(client=DownRedis(), retry_interval=60)
+    assert cache.get_cached_price("Amazon.in", "Pixel 8") is None
+    assert not cache.enabled
+
+    cache.cache_price("Amazon.in", "Pixel 8", OFFER)
+    assert cache.get_cached_price("Amazon.in", "Pixel 8")['price'] == 999.0
+
+def test_metrics_are_batched_into_one_pipeline():
+    client = FakeRedis()
+    cache = ScraperCache(client=client, metrics_interval=60)
+    cache.cache_price("Amazon.in", "Pixel 8", OFFER)
+    for _ in range(3):
+        cache.get_cached_price("Amazon.in", "Pixel 8")
+    cache.get_cached_price("Flipkart", "Pixel 8")
+    trips = client.round_trips
+
+    cache.flush_metrics()
+    assert client.round_trips == trips + 1
+    assert client.data['metrics:cache_hits'] == 3
+    assert client.data['metrics:cache_misses'] == 1
+
+def test_get_many_and_cache_many_batch_round_trips():
+    client = FakeRedis()
+    writer = ScraperCache(client=client, metrics_interval=60)
+    writer.cache_many([("Amazon.in", "Pixel 8", OFFER), ("Flipkart", "Pixel 8", dict(OFFER, site="Flipkart"))])
+    assert client.round_trips == 1
+
+    reader = ScraperCache(client=client, metrics_interval=60)
+    found = reader.get_many([("Amazon.in", "Pixel 8"), ("Flipkart", "Pixel 8"), ("Croma", "Pixel 8")])
+    assert client.round_trips == 2
+    assert set(found) == {("Amazon.in", "Pixel 8"), ("Flipkart", "Pixel 8")}
+    assert found[("Flipkart", "Pixel 8")]['source'] == 'cache'
+
+    reader.get_many([("Amazon.in", "Pixel 8")])  # now in the local tier
+    assert client.round_trips == 2
+
+def test_keys_ignore_case_and_spacing():
+    assert normalize_product("  Pixel \t 8 ") == "pixel 8"
+    cache = ScraperCache(client=FakeRedis(), metrics_interval=60)
+    cache.cache_price("Amazon.in", "Pixel  8", OFFER)
+    assert cache._get_key("Amazon.in", "pixel 8") == "price:Amazon.in:pixel_8"
+    assert cache.get_cached_price("Amazon.in", "pixel 8")['price'] == 999.0
@@ -34,3 +34,132 @@ def test_interaction_matrix(dummy_csv):
     assert matrix.shape == (2, 2)
     # User 1 (idx 0) rated Item 101 (idx 0) as 5.0
     assert matrix[0, 0] == 5.0
+
+def test_id_arrays_invert_mappings(dummy_csv):
+    loader = DatasetLoader(dummy_csv, names=['user_id', 'item_id', 'rating', 'timestamp'])
+    user_ids, item_ids = loader.get_id_arrays()
+    
+    assert [loader.user_map[u] for u in user_ids] == list(range(loader.n_users))
+    assert [loader.item_map[i] for i in item_ids] == list(range(loader.n_items))
+
+def test_csr_matrix_from_index_arrays(dummy_csv):
+    loader = DatasetLoader(dummy_csv, names=['user_id', 'item_id', 'rating', 'timestamp'])
+    user_idx, item_idx, ratings = loader.get_index_arrays()
+    assert user_idx.dtype == np.int32 and item_idx.dtype == np.int32
+    
+    matrix = loader.get_csr_matrix()
+    np.testing.assert_array_equal(matrix.toarray(), loader.get_interaction_matrix())
+    assert list(loader.user_ids) == [1, 2] and list(loader.item_ids) == [101, 102]
+    assert loader.reverse_item_map[1] == 102
+
+def test_multichar_separator(tmp_path):
+    path = tmp_path / "ratings.dat"
+    path.write_text("1::10::4.0::5\n2::10::3.0::6\n")
+    loader = DatasetLoader(str(path), sep='::')
+    assert loader.get_csr_matrix().shape == (2, 1)
+
+def test_fit_accepts_loader_matrix(dummy_csv):
+    from backend.recommender.als_ncg import ALSRecommender
+    loader = DatasetLoader(dummy_csv)
+    matrix = loader.get_csr_matrix()
+    
+    model = ALSRecommender(n_factors=2, max_iter=2)
+    model.fit(matrix, user_ids=loader.user_ids, item_ids=loader.item_ids)
+    assert model.U.shape == (2, 2)
+    assert np.shares_memory(model.train_matrix.indices, matrix.indices)  # no copy through tuples
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_streaming_matches_in_memory(tmp_path, spill):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "ratings.csv"
+    rows = [f"{u},{i},{r},0" for u, i, r in zip(rng.integers(0, 40, 500), rng.integers(0, 25, 500) * 7,
+                                                rng.integers(1, 6, 500))]
+    path.write_text("\n".join(rows))
+    
+    expected_loader = DatasetLoader(str(path))
+    expected = expected_loader.get_csr_matrix()
+    
+    loader = DatasetLoader(str(path))
+    matrix = loader.load_streaming(chunksize=64, spill_dir=str(tmp_path) if spill else None)
+    assert loader.df is None
+    np.testing.assert_array_equal(loader.user_ids, expected_loader.user_ids)
+    np.testing.assert_array_equal(loader.item_ids, expected_loader.item_ids)
+    assert loader.user_ids.dtype == expected_loader.user_ids.dtype
+    assert (matrix != expected).nnz == 0
+    
+    user_ids, item_ids = loader.get_id_arrays()
+    assert loader.df is None  # the ids come from the stream, not a re-read of the CSV
+    np.testing.assert_array_equal(user_ids, expected_loader.user_ids)
+
+def test_streaming_uses_declared_id_dtypes(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("1,101,5.0,0\n2,102,4.0,0\n3,101,3.0,0\n")
+    loader = DatasetLoader(str(path))
+    loader.load_streaming(chunksize=1)
+    assert loader.user_ids.dtype == np.int64 and loader.item_ids.dtype == np.int64
+    
+    # Non-numeric ids are declared too, instead of being inferred chunk by chunk
+    path.write_text("u1,A7,5.0,0\nu2,B2,4.0,0\nu1,B2,3.0,0\n")
+    dtypes = {'user_id': 'category', 'item_id': 'category'}
+    streamed = DatasetLoader(str(path), dtypes=dtypes)
+    matrix = streamed.load_streaming(chunksize=1)
+    expected = DatasetLoader(str(path), dtypes=dtypes)
+    assert (matrix != expected.get_csr_matrix()).nnz == 0
+    assert list(streamed.user_ids) == ["u1", "u2"] and list(streamed.item_ids) == ["A7", "B2"]
+
+def test_dense_matrix_guard(dummy_csv):
+    loader = DatasetLoader(dummy_csv)
+    with pytest.raises(MemoryError):
+        loader.get_interaction_matrix(max_bytes=16)
+
+def test_csr_with_timestamps_merges_duplicates(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("1,101,5.0,10\n2,101,4.0,30\n1,101,1.0,20\n1,102,3.0,5\n")
+    matrix, timestamps = DatasetLoader(str(path)).get_csr_with_timestamps()
+    
+    assert matrix.nnz == 3
+    assert matrix[0, 0] == 6.0
+    np.testing.assert_array_equal(timestamps, [20, 5, 30])
+
+def test_load_cached_reuses_and_invalidates(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("1,101,5.0,10\n2,102,4.0,30\n")
+    matrix, timestamps = DatasetLoader(str(path)).load_cached()
+    assert (tmp_path / "ratings.csv.cache" / "meta.json").exists()
+    
+    cached = DatasetLoader(str(path))
+    cached_matrix, cached_timestamps = cached.load_cached()
+    assert cached.df is None  # served from the binary cache, no CSV parsing
+    assert isinstance(cached_timestamps, np.memmap)
+    assert (cached_matrix != matrix).nnz == 0
+    np.testing.assert_array_equal(cached.user_ids, [1, 2])
+    np.testing.assert_array_equal(cached.get_id_arrays()[1], [101, 102])
+    assert cached.df is None
+    
+    renamed = DatasetLoader(str(path), names=['item_id', 'user_id', 'rating', 'timestamp'])
+    renamed.load_cached()
+    assert renamed.df is not None  # other column names: cache rebuilt
+    np.testing.assert_array_equal(renamed.user_ids, [101, 102])
+    retyped = DatasetLoader(str(path), names=['item_id', 'user_id', 'rating', 'timestamp'], dtypes={'user_id': str})
+    retyped.load_cached()
+    assert retyped.df is not None
+    
+    path.write_text("1,101,5.0,10\n2,102,4.0,30\n3,103,2.0,40\n")
+    rebuilt = DatasetLoader(str(path))
+    assert rebuilt.load_cached()[0].shape == (3, 3)
+    assert rebuilt.df is not None
+
+def test_load_cached_rebuild_leaves_mapped_cache_intact(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("1,101,5.0,10\n2,102,4.0,30\n")
+    DatasetLoader(str(path)).load_cached()
+    serving, _ = DatasetLoader(str(path)).load_cached()  # memory-mapped by a running job
+    
+    for extra in ("3,103,2.0,40\n", "4,104,1.0,50\n"):
+        path.write_text(path.read_text() + extra)
+        assert DatasetLoader(str(path)).load_cached()[0].nnz == len(path.read_text().splitlines())
+    
+    # Its files were neither rewritten nor truncated; only the last two builds remain
+    np.testing.assert_array_equal(serving.data, [5.0, 4.0])
+    assert len(list((tmp_path / "ratings.csv.cache").glob("data-*"))) == 2
+    assert DatasetLoader(str(path)).load_cached()[0].nnz == 4
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random
+from backend.recommender.evaluation import rmse, ranking_metrics
+from backend.recommender.preprocess import Preprocessor
+
+@pytest.fixture
+def setup():
+    rng = np.random.default_rng(0)
+    matrix = sparse_random(60, 40, density=0.2, format='csr', random_state=0)
+    matrix.data = np.round(matrix.data * 4 + 1)
+    train, test = Preprocessor.random_split_sparse(matrix, test_size=0.3)
+    return rng.normal(size=(60, 4)), rng.normal(size=(40, 4)), train, test
+
+def _reference(U, V, train, test, k):
+    precision, recall, ndcg, hits = [], [], [], []
+    for u in range(U.shape[0]):
+        relevant = set(test[u].indices)
+        if not relevant:
+            continue
+        scores = U[u] @ V.T
+        scores[train[u].indices] = -np.inf
+        top = np.argsort(-scores)[:k]
+        gains = [1.0 if i in relevant else 0.0 for i in top]
+        n_hits = sum(gains)
+        precision.append(n_hits / k)
+        recall.append(n_hits / len(relevant))
+        dcg = sum(g / np.log2(r + 2) for r, g in enumerate(gains))
+        idcg = sum(1 / np.log2(r + 2) for r in range(min(len(relevant), k)))
+        ndcg.append(dcg / idcg)
+        hits.append(n_hits > 0)
+    return [np.mean(precision), np.mean(recall), np.mean(ndcg), np.mean(hits)]
+
+def test_ranking_metrics_match_per_user_loop(setup):
+    U, V, train, test = setup
+    metrics = ranking_metrics(U, V, train, test, k=5, block_size=16)
+    expected = _reference(U, V, train, test, 5)
+    np.testing.assert_allclose(
+        [metrics["precision@5"], metrics["recall@5"], metrics["ndcg@5"], metrics["hit_rate@5"]], expected)
+
+def test_ranking_metrics_processes_match_serial(setup):
+    U, V, train, test = setup
+    serial = ranking_metrics(U, V, train, test, k=5, block_size=16)
+    parallel = ranking_metrics(U, V, train, test, k=5, block_size=16, n_jobs=2)
+    assert serial == pytest.approx(parallel)
+
+def test_rmse(setup):
+    U, V, _, test = setup
+    coo = test.tocoo()
+    expected = np.sqrt(np.mean([(r - U[u] @ V[i]) ** 2 for u, i, r in zip(coo.row, coo.col, coo.data)]))
+    assert rmse(U, V, test) == pytest.approx(expected)
@@ -0,0 +1,160 @@
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+pytest.importorskip("aiohttp")
+
+from backend.scraper.http_fetcher import AsyncHTTPFetcher, PriceParser, parse_price
+from backend.scraper.adapters import HTTPStoreAdapter
+from backend.scraper.scraper import PriceScraper
+
+PAGE = (
+    '<html><body><div itemscope>'
+    '<a itemprop="url" href="/p/42">'
+    '<h2 itemprop="name">Redmi Note 13</h2></a>'
+    '<span class="price"><b>&#8377;</b>1,299.50</span>'
+    '</div>' + '<p>filler</p>' * 20000 + '</body></html>'
+).encode()  # the price comes first; /big serves the whole page
+
+class FakeStore(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    state = {}
+
+    def do_GET(self):
+        s = self.state
+        with s['lock']:
+            s['requests'] += 1
+            s['ports'].add(self.client_address[1])
+            s['active'] += 1
+            s['max_active'] = max(s['max_active'], s['active'])
+        try:
+            if self.path.startswith('/flaky') and s['failures'] > 0:
+                s['failures'] -= 1
+                return self._send(503, b'busy')
+            if self.path.startswith('/missing'):
+                return self._send(404, b'not found')
+            if self.path.startswith('/slow'):
+                time.sleep(0.2)
+            if self.path.startswith('/stalled'):
+                time.sleep(1.5)
+            self._send(200, PAGE if self.path.startswith('/big') else PAGE[:PAGE.index(b'<p>')])
+        finally:
+            with s['lock']:
+                s['active'] -= 1
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading once it had the price
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def store():
+    FakeStore.state = {'lock': threading.Lock(), 'requests': 0, 'ports': set(),
+                       'active': 0, 'max_active': 0, 'failures': 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStore)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", FakeStore.state
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def fetcher():
+    f = AsyncHTTPFetcher(limit_per_host=2, timeout=2.0, retries=2, backoff=0.01, chunk_size=1024)
+    yield f
+    f.close()
+
+def test_parse_price():
+    assert parse_price("₹1,29,999.00") == 129999.0
+    assert parse_price("Rs. 499") == 499.0
+    assert parse_price("out of stock") is None
+
+def test_parser_across_chunk_boundaries():
+    parser = PriceParser()
+    html = PAGE.decode()[:300]
+    for i in range(0, len(html), 7):
+        parser.feed(html[i:i + 7])
+    assert parser.price == 1299.5
+    assert parser.name == "Redmi Note 13"
+    assert parser.url == "/p/42"
+
+def test_fetch_reuses_connection(store, fetcher):
+    base, state = store
+    for _ in range(5):
+        page = fetcher.fetch(f"{base}/item")
+        assert page.price == 1299.5
+    assert state['requests'] == 5
+    assert len(state['ports']) == 1
+
+def test_fetch_stops_reading_at_price(store, fetcher):
+    base, state = store
+    page = fetcher.fetch(f"{base}/big")
+    assert page.price == 1299.5
+    # The 200KB tail is neither read nor drained, so the connection is not reused
+    assert fetcher.fetch(f"{base}/item").price == 1299.5
+    assert len(state['ports']) == 2
+
+def test_fetch_retries_transient_errors(store, fetcher):
+    base, state = store
+    state['failures'] = 2
+    assert fetcher.fetch(f"{base}/flaky").price == 1299.5
+    assert state['requests'] == 3
+
+def test_fetch_gives_up_after_retries(store, fetcher):
+    base, state = store
+    state['failures'] = 10
+    with pytest.raises(ConnectionError):
+        fetcher.fetch(f"{base}/flaky")
+    assert state['requests'] == 3
+
+def test_fetch_missing_page(store, fetcher):
+    base, _ = store
+    assert fetcher.fetch(f"{base}/missing") is None
+
+def test_fetch_many_respects_per_host_limit(store, fetcher):
+    base, state = store
+    pages = fetcher.fetch_many([f"{base}/slow?q={i}" for i in range(6)])
+    assert [p.price for p in pages] == [1299.5] * 6
+    assert state['max_active'] <= 2
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_all_live_sites(mock_cache, store, fetcher):
+    mock_cache.get_cached_price.return_value = None
+    base, _ = store
+    scraper = PriceScraper(sites=[
+        {"name": "LiveStore", "url": base, "search_url": base + "/search?q={}"},
+        {"name": "GoneStore", "url": base, "search_url": base + "/missing?q={}"},
+    ])
+    assert isinstance(scraper.adapters["LiveStore"], HTTPStoreAdapter)
+    for adapter in scraper.adapters.values():
+        adapter.fetcher = fetcher
+
+    result = scraper.scrape_all("redmi note 13")
+    assert result['partial'] is False
+    assert len(result['results']) == 1
+    offer = result['results'][0]
+    assert offer['site'] == "LiveStore"
+    assert offer['price'] == 1299.5
+    assert offer['source'] == "scraped"
+
+@patch('backend.scraper.scraper.cache')
+def test_stalled_site_frees_its_worker(mock_cache, store, fetcher):
+    mock_cache.get_cached_price.return_value = None
+    base, _ = store
+    scraper = PriceScraper(sites=[{"name": "SlowStore", "url": base, "search_url": base + "/stalled?q={}"}],
+                           max_workers=1, site_timeout=0.3)
+    scraper.adapters["SlowStore"].fetcher = fetcher
+    
+    start = time.time()
+    assert scraper.scrape_all("tv")['timed_out'] == ["SlowStore"]
+    # The fetch was cancelled with the site's budget, so the only pool thread is free again
+    assert scraper.executor.submit(time.time).result(timeout=1.0) - start < 0.8
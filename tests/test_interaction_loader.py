@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+from flask import Flask
+from backend.api.models import db, Interaction
+from backend.recommender.interaction_loader import InteractionLoader
+
+@pytest.fixture
+def session():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Interaction(user_id=7, product_id=30, type='view'),
+            Interaction(user_id=7, product_id=30, type='click'),
+            Interaction(user_id=7, product_id=11, type='view'),
+            Interaction(user_id=3, product_id=11, type='view'),
+            Interaction(user_id=3, product_id=None, type='search'),
+            Interaction(user_id=0, product_id=11, type='view'),
+        ])
+        db.session.commit()
+        yield db.session
+
+def test_load_builds_weighted_matrix(session):
+    loader = InteractionLoader(session)
+    matrix = loader.load()
+    
+    assert matrix.shape == (2, 2)
+    assert list(loader.user_ids) == [3, 7]
+    assert list(loader.item_ids) == [11, 30]
+    
+    u7, p30 = loader.user_index(7), 1
+    assert matrix[u7, p30] == pytest.approx(4.0)  # view + click
+    assert matrix[loader.user_index(3), 0] == pytest.approx(1.0)
+    assert loader.user_index(0) is None
+
+def test_item_metadata_aligned_with_columns(session, monkeypatch):
+    from backend.api.models import Product
+    session.add_all([
+        Product(id=11, name="TV", price=1.0, rating=4.5, reviews=20, category="TV"),
+        Product(id=30, name="Phone", price=1.0, rating=None, reviews=None, category="Mobiles"),
+    ])
+    session.commit()
+    loader = InteractionLoader(session)
+    loader.load()
+    
+    metadata = loader.item_metadata(window_days=1)
+    assert list(metadata["category"]) == ["TV", "Mobiles"]
+    assert metadata["rating"][0] == 4.5 and np.isnan(metadata["rating"][1])
+    assert list(metadata["reviews"]) == [20, 0]
+    assert list(metadata["recent"]) == [3, 2]  # anonymous views count toward trending
+    
+    # Large catalogs are queried in chunks (SQLite's bound-parameter limit)
+    monkeypatch.setattr('backend.recommender.interaction_loader.SQL_IN_CHUNK', 1)
+    chunked = loader.item_metadata(window_days=1)
+    assert list(chunked["category"]) == ["TV", "Mobiles"]
@@ -0,0 +1,69 @@
+import numpy as np
+from backend.recommender.item_similarity import top_k_cosine_neighbours
+from backend.recommender.als_ncg import ALSRecommender
+
+def test_blocked_neighbours_match_dense():
+    V = np.random.default_rng(0).normal(size=(300, 6))
+    neighbours, similarities = top_k_cosine_neighbours(V, k=5, block_size=64)
+    assert neighbours.dtype == np.int32 and similarities.dtype == np.float16
+    
+    normalized = V / np.linalg.norm(V, axis=1, keepdims=True)
+    dense = normalized @ normalized.T
+    np.fill_diagonal(dense, -np.inf)
+    np.testing.assert_array_equal(neighbours, np.argsort(-dense, axis=1)[:, :5])
+    np.testing.assert_allclose(similarities, np.sort(dense, axis=1)[:, ::-1][:, :5], atol=1e-3)
+
+def test_small_catalog_is_padded():
+    neighbours, similarities = top_k_cosine_neighbours(np.eye(3), k=5)
+    assert neighbours.shape == (3, 5)
+    assert (neighbours[:, 2:] == -1).all()
+    
+    neighbours, _ = top_k_cosine_neighbours(np.vstack([np.eye(3), np.zeros((1, 3))]), k=2)
+    assert (neighbours[3] == -1).all()  # no factors yet, no neighbours
+
+def test_similar_survives_save_load(tmp_path):
+    model = ALSRecommender(n_factors=3, max_iter=2, n_similar=4)
+    model.fit([(u, i, float((u + i) % 5 + 1)) for u in range(10) for i in range(8)])
+    expected = model.similar(2, n_top=3)
+    assert len(expected) == 3 and all(i != 2 for i, _ in expected)
+    
+    model.save(str(tmp_path))
+    loaded = ALSRecommender.load(str(tmp_path))
+    assert loaded.similar(2, n_top=3) == expected
+    
+    loaded.partial_fit([(0, 8, 5.0)])
+    # Only the updated rows are recomputed; the new item gets a list right away
+    assert loaded.similar_items.shape == (9, 4)
+    assert len(loaded.similar(8, n_top=3)) == 3
+    
+def test_neighbours_of_selected_rows():
+    V = np.random.default_rng(1).normal(size=(200, 5))
+    full = top_k_cosine_neighbours(V, k=4, block_size=32)
+    rows = np.array([3, 150, 7])
+    partial = top_k_cosine_neighbours(V, k=4, block_size=2, rows=rows)
+    np.testing.assert_array_equal(partial[0], full[0][rows])
+    np.testing.assert_array_equal(partial[1], full[1][rows])
+
+def test_large_catalog_builds_lists_once_on_save(monkeypatch, tmp_path):
+    monkeypatch.setattr('backend.recommender.als_ncg.SIMILAR_AUTO_MAX_ITEMS', 4)
+    model = ALSRecommender(n_factors=3, max_iter=2, n_similar=4)
+    model.fit([(u, i, float((u + i) % 5 + 1)) for u in range(10) for i in range(8)])
+    assert model.similar_items is None  # not built during fit
+    
+    on_demand = model.similar(2, n_top=3)  # just this item, no full build
+    assert len(on_demand) == 3 and model.similar_items is None
+    
+    model.save(str(tmp_path))
+    loaded = ALSRecommender.load(str(tmp_path))
+    assert isinstance(loaded.similar_items, np.memmap)
+    assert loaded.similar(2, n_top=3) == on_demand
+
+def test_fold_in_users_extends_lists_for_new_items():
+    model = ALSRecommender(n_factors=3, max_iter=2, n_similar=4)
+    model.fit([(u, i, float((u + i) % 5 + 1)) for u in range(10) for i in range(8)])
+    
+    # A new user who also rated two items the model has never seen
+    model.fold_in_users(np.array([[5.0, 0, 0, 0, 0, 0, 0, 0, 4.0, 3.0]]))
+    assert model.similar_items.shape == (10, 4)
+    assert len(model.similar(9, n_top=3)) == 3
+    assert np.abs(model.V[8:]).sum() > 0  # solved, not left at zero
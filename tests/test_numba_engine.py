@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+from scipy.sparse import csr_matrix
+
+pytest.importorskip("numba")
+
+from backend.recommender.als_ncg import ALSRecommender
+from backend.recommender.numba_engine import NumbaALS, NumbaSGD
+from backend.recommender.parallel_engine import _solve_rows
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return [(u, i, float(rng.integers(1, 6))) for u in range(15) for i in range(10) if rng.random() < 0.4]
+
+def test_numba_engine_matches_numpy_engine(data):
+    np.random.seed(3)
+    reference = ALSRecommender(n_factors=3, max_iter=3)
+    reference.fit(data)
+    
+    np.random.seed(3)
+    jitted = ALSRecommender(n_factors=3, max_iter=3, engine="numba")
+    jitted.fit(data)
+    
+    np.testing.assert_allclose(jitted.U, reference.U, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(jitted.V, reference.V, rtol=1e-8, atol=1e-10)
+
+def test_numba_als_half_step_matches_row_solver(data):
+    users, items, ratings = map(np.array, zip(*data))
+    matrix = csr_matrix((ratings, (users, items)), shape=(15, 10))
+    rng = np.random.default_rng(2)
+    U, V = rng.normal(size=(15, 3)), rng.normal(size=(10, 3))
+    solver = NumbaALS(matrix, U, V)
+    
+    solver.update_users(0.1)
+    expected = _solve_rows(range(15), V, matrix.indptr, matrix.indices, matrix.data, 0.1)
+    np.testing.assert_allclose(solver.U, expected, rtol=1e-8, atol=1e-10)
+    np.testing.assert_array_equal(solver.V, V)  # the fixed side is untouched
+
+def test_numba_sgd_reduces_error(data):
+    users, items, ratings = map(np.array, zip(*data))
+    matrix = csr_matrix((ratings, (users, items)))
+    rng = np.random.default_rng(1)
+    solver = NumbaSGD(matrix, rng.normal(scale=0.1, size=(15, 4)), rng.normal(scale=0.1, size=(10, 4)), lr=0.05, seed=0)
+    
+    def rmse():
+        pred = np.sum(solver.U[users] * solver.V[items], axis=1)
+        return np.sqrt(np.mean((ratings - pred) ** 2))
+    
+    before = rmse()
+    for _ in range(20):
+        solver.sweep(0.01)
+    assert rmse() < before
+
+def test_sgd_engine_reproducible_with_random_state(data):
+    import numba
+    threads = numba.get_num_threads()
+    numba.set_num_threads(1)  # Hogwild updates from several threads may interleave
+    try:
+        fits = [ALSRecommender(n_factors=3, max_iter=3, engine="numba_sgd", random_state=4) for _ in range(2)]
+        for model in fits:
+            model.fit(data)
+    finally:
+        numba.set_num_threads(threads)
+    np.testing.assert_array_equal(fits[0].U, fits[1].U)
+    np.testing.assert_array_equal(fits[0].V, fits[1].V)
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        ALSRecommender(engine="tensorflow")
@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+from scipy.sparse import csr_matrix
+from backend.recommender.parallel_engine import _solve_rows, _solve_rows_batched, _solve_rows_implicit, solve_chunk
+
+@pytest.fixture
+def ratings():
+    rng = np.random.default_rng(0)
+    dense = rng.integers(1, 6, size=(40, 30)).astype(float)
+    dense[rng.random(dense.shape) < 0.8] = 0.0
+    dense[0, :] = 4.0      # fully rated row (empty complement)
+    dense[1, :25] = 3.0    # denser than half the items -> YtY path
+    dense[2, :] = 0.0      # no ratings -> stays zero
+    return csr_matrix(dense)
+
+def test_batched_solver_matches_row_loop(ratings):
+    fixed = np.random.default_rng(1).normal(size=(30, 4))
+    rows = np.arange(ratings.shape[0])
+    args = (rows, fixed, ratings.indptr, ratings.indices, ratings.data, 0.1)
+    
+    expected = _solve_rows(*args)
+    actual = _solve_rows_batched(*args)
+    
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+    assert np.all(actual[2] == 0)
+
+def test_solve_chunk_returns_index_vector_pairs(ratings):
+    fixed = np.random.default_rng(2).normal(size=(30, 4))
+    results = solve_chunk([1, 5, 7], fixed, ratings, 0.1)
+    expected = _solve_rows([1, 5, 7], fixed, ratings.indptr, ratings.indices, ratings.data, 0.1)
+    
+    assert [idx for idx, _ in results] == [1, 5, 7]
+    np.testing.assert_allclose(np.array([vec for _, vec in results]), expected, rtol=1e-9)
+
+def test_implicit_solver_matches_dense_formulation(ratings):
+    fixed = np.random.default_rng(3).normal(size=(30, 4))
+    alpha, lam = 5.0, 0.1
+    rows = np.arange(ratings.shape[0])
+    
+    actual = _solve_rows_implicit(rows, fixed, ratings.indptr, ratings.indices, ratings.data, lam, alpha)
+    
+    dense = ratings.toarray()
+    for u in rows:
+        confidence = 1 + alpha * dense[u]
+        preference = (dense[u] > 0).astype(float)
+        A = fixed.T @ (confidence[:, None] * fixed) + lam * np.eye(4)
+        expected = np.linalg.solve(A, fixed.T @ (confidence * preference))
+        np.testing.assert_allclose(actual[u], expected, rtol=1e-9, atol=1e-12)
@@ -0,0 +1,55 @@
+import numpy as np
+from unittest.mock import patch
+from scipy.sparse import csr_matrix
+from backend.recommender.popularity import PopularityTier
+from backend.recommender.als_ncg import ALSRecommender
+
+def _matrix():
+    # item 2 is the most consumed, item 0 the least
+    rows = [0, 1, 2, 0, 1, 0]
+    cols = [2, 2, 2, 1, 1, 0]
+    return csr_matrix((np.ones(6), (rows, cols)), shape=(3, 4))
+
+def test_global_ranking_from_column_sums():
+    tier = PopularityTier().fit(_matrix())
+    assert [i for i, _ in tier.top(3)] == [2, 1, 0]
+    assert tier.global_items.dtype == np.int32
+
+def test_ratings_categories_and_trending():
+    tier = PopularityTier().fit(
+        _matrix(),
+        rating=np.array([5.0, 4.0, 2.0, 4.9]),
+        reviews=np.array([1000, 10, 10, 0]),
+        category=np.array(["audio", "audio", "tv", "tv"]),
+        recent=np.array([0, 0, 1, 5]),
+    )
+    assert tier.top(1)[0][0] == 0  # well-reviewed 5 stars beats the raw bestseller
+    assert [i for i, _ in tier.top(5, category="tv")] == [2, 3]
+    assert [i for i, _ in tier.top(5, trending=True)] == [3, 2]
+    assert tier.top(2, category="unknown") == tier.top(2)
+
+def test_cold_users_get_popular_items():
+    data = [(0, 0, 5.0), (0, 1, 3.0), (1, 1, 4.0), (3, 2, 1.0), (3, 1, 2.0)]
+    model = ALSRecommender(n_factors=2, max_iter=2)
+    model.fit(data)
+    popular = model.popularity.top(2)
+    
+    assert model.predict(None, n_top=2) == popular
+    assert model.predict(50, n_top=2) == popular
+    assert model.predict(2, n_top=2) == popular  # row exists but has no ratings
+    assert model.predict(0, n_top=2) != popular
+    # Batch scoring routes the same users the same way
+    assert model.predict_batch([50, 2, 0], n_top=2) == [popular, popular, model.predict(0, n_top=2)]
+
+def test_item_metadata_survives_save_load(tmp_path):
+    model = ALSRecommender(n_factors=2, max_iter=1)
+    model.fit([(0, 0, 5.0), (0, 1, 3.0), (1, 2, 4.0)])
+    model.set_item_metadata(category=np.array(["a", "b", "b"], dtype=object), recent=np.array([0, 1, 4]))
+    model.save(str(tmp_path))
+    
+    with patch.object(ALSRecommender, '_fit_popularity', side_effect=AssertionError("recomputed on load")):
+        loaded = ALSRecommender.load(str(tmp_path))
+    assert isinstance(loaded.popularity.global_items, np.memmap)
+    assert loaded.popularity.top(3) == model.popularity.top(3)
+    assert loaded.popularity.top(3, category="b") == model.popularity.top(3, category="b")
+    assert [i for i, _ in loaded.predict(None, n_top=2, trending=True)] == [2, 1]
@@ -0,0 +1,41 @@
+import numpy as np
+from scipy.sparse import random as sparse_random
+from backend.recommender.preprocess import Preprocessor
+
+def _ratings():
+    matrix = sparse_random(50, 30, density=0.2, format='csr', random_state=0)
+    matrix.data = np.round(matrix.data * 4 + 1)
+    return matrix
+
+def _assert_partition(matrix, train, test):
+    assert train.shape == test.shape == matrix.shape
+    assert train.nnz + test.nnz == matrix.nnz
+    assert abs(train + test - matrix).max() == 0
+    assert train.multiply(test).nnz == 0
+
+def test_random_split_sparse():
+    matrix = _ratings()
+    train, test = Preprocessor.random_split_sparse(matrix, test_size=0.25, random_state=1)
+    _assert_partition(matrix, train, test)
+    assert test.nnz == round(0.25 * matrix.nnz)
+
+def test_leave_k_out_holds_latest_per_user():
+    matrix = _ratings()
+    timestamps = np.random.default_rng(0).permutation(matrix.nnz)
+    train, test = Preprocessor.leave_k_out_sparse(matrix, k=2, timestamps=timestamps)
+    _assert_partition(matrix, train, test)
+    
+    counts = np.diff(matrix.indptr)
+    np.testing.assert_array_equal(np.diff(test.indptr), np.where(counts > 2, 2, 0))
+    for u in np.flatnonzero(counts > 2):
+        ts = timestamps[matrix.indptr[u]:matrix.indptr[u + 1]]
+        held = np.isin(matrix.indices[matrix.indptr[u]:matrix.indptr[u + 1]], test[u].indices)
+        assert ts[held].min() > ts[~held].max()
+
+def test_temporal_split_sparse():
+    matrix = _ratings()
+    timestamps = np.arange(matrix.nnz)[::-1]
+    train, test = Preprocessor.temporal_split_sparse(matrix, timestamps, test_size=0.2)
+    _assert_partition(matrix, train, test)
+    cutoff = np.quantile(timestamps, 0.8)
+    assert test.nnz == int((timestamps > cutoff).sum())
@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock, patch
+from backend.api.utils.rec_cache import RecommendationCache
+
+RECS = [{"item_id": 1, "score": 0.9}]
+
+def test_hit_miss_and_lru_eviction():
+    cache = RecommendationCache(max_entries=2)
+    assert cache.get(1, 5, "v1") is None
+    cache.set(1, 5, "v1", RECS)
+    cache.set(2, 5, "v1", RECS)
+    assert cache.get(1, 5, "v1") == RECS
+    
+    cache.set(3, 5, "v1", RECS)  # evicts user 2, the least recently used
+    assert cache.get(2, 5, "v1") is None
+    assert cache.get(1, 5, "v1") == RECS
+    assert (cache.hits, cache.misses) == (2, 2)
+
+def test_ttl_expiry():
+    cache = RecommendationCache(ttl=10)
+    with patch('backend.api.utils.rec_cache.time.monotonic', return_value=100.0):
+        cache.set(1, 5, "v1", RECS)
+    with patch('backend.api.utils.rec_cache.time.monotonic', return_value=111.0):
+        assert cache.get(1, 5, "v1") is None
+
+def test_invalidation_by_user_and_model_version():
+    cache = RecommendationCache()
+    cache.set(1, 5, "v1", RECS)
+    cache.set(1, 10, "v1", RECS)
+    cache.set(2, 5, "v1", RECS)
+    cache.invalidate_user(1)
+    assert cache.get(1, 5, "v1") is None and cache.get(1, 10, "v1") is None
+    assert cache.get(2, 5, "v1") == RECS
+    
+    assert cache.get(2, 5, "v2") is None
+    assert cache.get(2, 5, "v1") is None  # local tier was emptied when v2 appeared
+
+def test_redis_tier_and_metrics():
+    redis_client = MagicMock()
+    redis_client.hget.return_value = '[{"item_id": 1, "score": 0.9}]'
+    cache = RecommendationCache(redis_client=redis_client, metrics_interval=60)
+    
+    assert cache.get(7, 5, "v1") == RECS
+    redis_client.hget.assert_called_once_with("recs:user:7", "v1:5")
+    
+    cache.get(7, 5, "v1")  # now served locally
+    assert redis_client.hget.call_count == 1
+    redis_client.pipeline.assert_not_called()  # counters are batched
+    
+    cache.flush_metrics()
+    pipe = redis_client.pipeline.return_value
+    pipe.incrby.assert_any_call('metrics:rec_cache_hits', 2)
+    pipe.execute.assert_called_once()
+    
+    cache.invalidate_user(7)
+    redis_client.delete.assert_called_once_with("recs:user:7")
+
+def test_local_tier_is_short_lived_with_redis():
+    # Another worker's invalidate_user() only reaches Redis; local copies expire quickly
+    redis_client = MagicMock()
+    redis_client.hget.return_value = None
+    cache = RecommendationCache(ttl=300, redis_client=redis_client, local_ttl=5)
+    with patch('backend.api.utils.rec_cache.time.monotonic', return_value=100.0):
+        cache.set(1, 5, "v1", RECS)
+    with patch('backend.api.utils.rec_cache.time.monotonic', return_value=104.0):
+        assert cache.get(1, 5, "v1") == RECS
+    with patch('backend.api.utils.rec_cache.time.monotonic', return_value=106.0):
+        assert cache.get(1, 5, "v1") is None  # re-read from Redis, where it was deleted
+    assert redis_client.hget.call_count == 1
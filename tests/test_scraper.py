@@ -1,3 +1,4 @@
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 from backend.scraper.scraper import PriceScraper
@@ -31,3 +32,96 @@ def test_scrape_all(scraper):
         assert result['product'] == "test product"
         assert len(result['results']) == 2
         assert result['results'][0]['price'] == 90 # Sorted by price
+
+def _fake_store(price, delay):
+    def adapter(site, product_name):
+        time.sleep(delay)
+        return {'site': site['name'], 'price': price}
+    return adapter
+
+@pytest.fixture
+def fake_sites():
+    sites = [{"name": f"Store{i}", "url": f"http://store{i}.test"} for i in range(4)]
+    s = PriceScraper(sites=sites, max_workers=8)
+    for i, site in enumerate(sites):
+        s.register_adapter(site['name'], _fake_store(100 - i, 0.2))
+    return s
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_all_concurrent(mock_cache, fake_sites):
+    mock_cache.get_cached_price.return_value = None
+    start = time.time()
+    result = fake_sites.scrape_all("test product")
+    elapsed = time.time() - start
+
+    assert elapsed < 0.6  # four 0.2s sites, fetched in parallel
+    assert [r['price'] for r in result['results']] == [97, 98, 99, 100]
+    assert result['partial'] is False
+    assert mock_cache.cache_price.call_count == 4
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_all_slow_site_times_out(mock_cache, fake_sites):
+    mock_cache.get_cached_price.return_value = None
+    fake_sites.register_adapter("Store3", _fake_store(1, 2.0))
+    start = time.time()
+    result = fake_sites.scrape_all("test product", site_timeout=0.5)
+
+    assert time.time() - start < 1.5
+    assert result['partial'] is True
+    assert result['timed_out'] == ["Store3"]
+    assert [r['site'] for r in result['results']] == ["Store2", "Store1", "Store0"]
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_all_deadline(mock_cache, fake_sites):
+    mock_cache.get_cached_price.return_value = None
+    for site in fake_sites.sites:
+        fake_sites.register_adapter(site['name'], _fake_store(10, 2.0))
+    start = time.time()
+    result = fake_sites.scrape_all("test product", site_timeout=5.0, deadline=0.3)
+
+    assert time.time() - start < 1.0
+    assert result['results'] == []
+    assert sorted(result['timed_out']) == ["Store0", "Store1", "Store2", "Store3"]
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_many_fetches_only_misses(mock_cache, fake_sites):
+    mock_cache.get_many.return_value = {
+        ("Store0", "phone"): {'site': 'Store0', 'price': 50, 'source': 'cache'},
+    }
+    fake_sites.sites = fake_sites.sites[:2]
+    calls = []
+    fake_sites.register_adapter("Store0", lambda site, name: calls.append(name) or {'site': 'Store0', 'price': 60})
+    fake_sites.register_adapter("Store1", _fake_store(70, 0.1))
+
+    results = list(fake_sites.scrape_many(["phone", "laptop"]))
+
+    pairs = mock_cache.get_many.call_args[0][0]
+    assert sorted(pairs) == [("Store0", "laptop"), ("Store0", "phone"), ("Store1", "laptop"), ("Store1", "phone")]
+    assert calls == ["laptop"]  # Store0/phone came from the cache
+    by_product = {r['product']: r for r in results}
+    assert [o['price'] for o in by_product['phone']['results']] == [50, 70]
+    assert [o['price'] for o in by_product['laptop']['results']] == [60, 70]
+
+    # Written back per product, as each one completes
+    written = [sorted((site, name) for site, name, _ in c[0][0]) for c in mock_cache.cache_many.call_args_list]
+    assert sorted(written) == [[("Store0", "laptop"), ("Store1", "laptop")], [("Store1", "phone")]]
+
+
+@patch('backend.scraper.scraper.cache')
+def test_scrape_many_large_batch_is_not_cut_short(mock_cache, fake_sites):
+    mock_cache.get_many.return_value = {}
+    for i in range(4):
+        fake_sites.register_adapter(f"Store{i}", _fake_store(100 - i, 0.1))
+    names = [f"product {n}" for n in range(20)]  # 80 calls on 8 workers: ~1s of work
+
+    stream = fake_sites.scrape_many(names, deadline=0.5)
+    first = next(stream)
+    # The first product was written back before the rest of the batch finished
+    assert mock_cache.cache_many.call_count == 1
+    written = mock_cache.cache_many.call_args[0][0]
+    assert len(written) == 4 and {name for _, name, _ in written} == {first['product']}
+
+    results = [first] + list(stream)
+    assert len(results) == 20
+    assert not any(r['partial'] for r in results)
+    assert mock_cache.cache_many.call_count == 20